@@ -0,0 +1,215 @@
+"""HTTP API over the scrape -> enrich -> match pipeline.
+
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+POST /searches               start a search (form fields, optional resume PDF); 202 with its id
+GET  /searches/{id}          status and progress of a search
+GET  /searches/{id}/results  progress, scraped jobs and matches as NDJSON, or SSE with
+                             Accept: text/event-stream
+POST /match                  match an uploaded resume PDF against the stored job index
+GET  /health                 worker pool and embedding model stats
+
+Searches run as pipeline.scrape_and_match jobs on the shared workers.WorkerPool.
+The pool's browser and model slots, the embedding model and the result cache
+are the same ones the dashboard uses. Requests beyond the limits below wait
+up to API_QUEUE_SECONDS for a slot and then get a 429.
+
+API_MAX_STREAMS    result streams open at once
+API_MAX_MATCHES    /match requests running at once
+API_QUEUE_SECONDS  how long a request may wait for a slot
+API_WARM_UP        1 (default) to load the embedding model at startup
+"""
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+import asyncio
+import json
+import logging
+import os
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+
+from batch_match import match_resume_texts
+from doc_loader import SCORE_THRESHOLD, SKILL_PREFILTER, TOP_K
+from embeddings import embedding_metrics, warm_up
+from job_index import get_job_index
+from pipeline import scrape_and_match
+from resume_parser import get_resume, resume_query_text
+from skill_index import resume_skills
+from workers import QueueFull, get_pool, model_slots
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+API_MAX_STREAMS = int(os.getenv("API_MAX_STREAMS", "64"))
+API_MAX_MATCHES = int(os.getenv("API_MAX_MATCHES", "4"))
+API_QUEUE_SECONDS = float(os.getenv("API_QUEUE_SECONDS", "10"))
+API_WARM_UP = os.getenv("API_WARM_UP", "1") == "1"
+# How often a result stream checks its search for progress
+POLL_SECONDS = 0.25
+
+stream_slots = asyncio.Semaphore(API_MAX_STREAMS)
+match_slots = asyncio.Semaphore(API_MAX_MATCHES)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if API_WARM_UP:
+        def log_failure(future):
+            if future.exception() is not None:
+                logger.error(f"Embedding warm-up failed: {future.exception()}")
+
+        # Loads in the background; the server accepts requests meanwhile
+        asyncio.get_running_loop().run_in_executor(None, warm_up).add_done_callback(log_failure)
+    yield
+
+
+app = FastAPI(title="Smart Apply API", lifespan=lifespan)
+
+
+async def acquire(semaphore, what):
+    """Wait up to API_QUEUE_SECONDS for a slot, else reject the request with a 429"""
+    try:
+        await asyncio.wait_for(semaphore.acquire(), API_QUEUE_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(429, f"Too many {what} in progress; try again shortly", headers={"Retry-After": "5"})
+
+
+def records(df):
+    """JSON-safe rows of a DataFrame (the pipeline uses [] for "no matches")"""
+    if df is None or len(df) == 0:
+        return []
+    return json.loads(df.to_json(orient='records', date_format='iso', default_handler=str))
+
+
+def job_status(job):
+    return {'id': job.id, 'name': job.name, 'status': job.status, 'progress': job.progress,
+            'message': job.message, 'error': job.error, 'created_at': job.created_at,
+            'finished_at': job.finished_at}
+
+
+def get_job(search_id):
+    job = get_pool().get(search_id)
+    if job is None:
+        raise HTTPException(404, f"No search {search_id}; finished searches are kept for an hour")
+    return job
+
+
+@app.post("/searches", status_code=202)
+async def submit_search(job_title: str = Form(...), location: str = Form(""), max_pages: int = Form(2),
+                        detailed: bool = Form(True), force_refresh: bool = Form(False),
+                        resume: UploadFile | None = File(None)):
+    if not job_title.strip():
+        raise HTTPException(422, "job_title must not be empty")
+    if not 1 <= max_pages <= 5:
+        raise HTTPException(422, "max_pages must be between 1 and 5")
+    pdf = await resume.read() if resume is not None else None
+    try:
+        search_id = get_pool().submit(scrape_and_match, job_title, location, max_pages, headless=True,
+                                      resume=pdf, detailed=detailed, force_refresh=force_refresh,
+                                      name=f"search:{job_title}")
+    except QueueFull as e:
+        raise HTTPException(429, f"The server is busy with other searches ({e})", headers={"Retry-After": "30"})
+    return {'id': search_id, 'status_url': f"/searches/{search_id}", 'results_url': f"/searches/{search_id}/results"}
+
+
+@app.get("/searches/{search_id}")
+async def search_status(search_id: str):
+    return job_status(get_job(search_id))
+
+
+async def search_events(job):
+    """(event, data) pairs: progress until the search finishes, then its results"""
+    last = None
+    while not job.done:
+        if (job.progress, job.message) != last:
+            last = (job.progress, job.message)
+            yield "progress", {'progress': job.progress, 'message': job.message}
+        await asyncio.sleep(POLL_SECONDS)
+    if job.status == "failed":
+        yield "error", {'error': job.error}
+        return
+
+    result = job.result
+    yield "summary", {'jobs': len(result['job_data']), 'matches': len(result['ai_job_list']),
+                      'scraped_at': result['scraped_at'], 'from_cache': result['from_cache'],
+                      'ai_error': result['ai_error']}
+    for row in records(result['job_data']):
+        yield "job", row
+    for row in records(result['ai_job_list']):
+        yield "match", row
+    if result['ai_enrichment'] is not None:
+        # embed_first mode: the matches above are raw; their enriched versions follow when ready.
+        # shield keeps a client disconnect from cancelling the enrichment other streams share.
+        try:
+            enriched = await asyncio.shield(asyncio.wrap_future(result['ai_enrichment']))
+            for row in records(enriched):
+                yield "enriched_match", row
+        except Exception as e:
+            yield "error", {'error': f"Not able to enrich the AI matched jobs: {e}"}
+    yield "done", {'id': job.id}
+
+
+@app.get("/searches/{search_id}/results")
+async def search_results(search_id: str, request: Request):
+    job = get_job(search_id)
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    # Wait for a free slot so a saturated server still answers 429, but leave taking it to the
+    # generator: a response that is never iterated would otherwise hold its slot forever
+    await acquire(stream_slots, "result streams")
+    stream_slots.release()
+
+    def encode(event, data):
+        if sse:
+            return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        return json.dumps({'event': event, 'data': data}, default=str) + "\n"
+
+    async def stream():
+        try:
+            await asyncio.wait_for(stream_slots.acquire(), API_QUEUE_SECONDS)
+        except asyncio.TimeoutError:
+            yield encode("error", {'error': "Too many result streams in progress; try again shortly"})
+            return
+        try:
+            async for event, data in search_events(job):
+                yield encode(event, data)
+        finally:
+            stream_slots.release()
+
+    return StreamingResponse(stream(), media_type="text/event-stream" if sse else "application/x-ndjson")
+
+
+def match_resume(pdf, k, score_threshold):
+    """(matched jobs, index size) for one resume PDF, using the model slots shared with the search jobs"""
+    with model_slots:
+        parsed = get_resume(pdf)
+        text = resume_query_text(parsed)
+        skills = [resume_skills(parsed)] if SKILL_PREFILTER else None
+        index = get_job_index()
+        return match_resume_texts([text], index=index, k=k, score_threshold=score_threshold,
+                                  skills=skills)[0], len(index)
+
+
+@app.post("/match")
+async def match(resume: UploadFile = File(...), k: int = Form(TOP_K),
+                score_threshold: float = Form(SCORE_THRESHOLD)):
+    if not 1 <= k <= 100:
+        raise HTTPException(422, "k must be between 1 and 100")
+    pdf = await resume.read()
+    await acquire(match_slots, "resume matches")
+    try:
+        matches, indexed = await asyncio.to_thread(match_resume, pdf, k, score_threshold)
+    except Exception as e:
+        logger.exception("Resume match failed")
+        raise HTTPException(422, f"Could not match the resume: {e}")
+    finally:
+        match_slots.release()
+    return {'indexed_jobs': indexed, 'matches': records(matches)}
+
+
+@app.get("/health")
+async def health():
+    metrics = embedding_metrics()
+    return {'jobs': get_pool().stats(),
+            'embedding_model': {key: metrics[key] for key in ('model', 'backend', 'load_seconds', 'documents',
+                                                              'docs_per_sec')}}
@@ -0,0 +1,61 @@
+"""Match many resumes against the job index in one pass.
+
+Resumes are parsed concurrently, embedded in one batched call (through the
+embedding cache) and searched with a single FAISS batch query. With
+SKILL_PREFILTER on, each resume is instead scored against its own skill
+shortlist.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from doc_loader import SCORE_THRESHOLD, SKILL_PREFILTER, TOP_K, hits_frame
+from embeddings import embed_texts
+from job_index import get_job_index
+from resume_parser import get_resume, resume_query_text
+from skill_index import resume_skills
+import os
+
+BATCH_PARSE_WORKERS = int(os.getenv("BATCH_PARSE_WORKERS", "8"))
+
+
+def parse_resumes(resumes, workers=BATCH_PARSE_WORKERS):
+    """get_resume output for each resume, or None where parsing failed"""
+    def parse(resume):
+        try:
+            return get_resume(resume)
+        except Exception as e:
+            print(f"---Failed to parse resume {getattr(resume, 'name', resume)!r:.80}: {e}---")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(resumes)))) as pool:
+        return list(pool.map(parse, resumes))
+
+
+def match_resume_texts(texts, index=None, k=TOP_K, score_threshold=SCORE_THRESHOLD, skills=None):
+    """One DataFrame of matched jobs (with a score column) per resume text; None texts get an empty one.
+
+    When skills (one collection per text) is given, each text is matched through its skill shortlist.
+    """
+    import pandas as pd
+
+    if index is None:
+        index = get_job_index()
+    present = [i for i, text in enumerate(texts) if text]
+    frames = [pd.DataFrame() for _ in texts]
+    if not present:
+        return frames
+    vectors = embed_texts([texts[i] for i in present])
+    if skills is not None:
+        for i, vector in zip(present, vectors):
+            frames[i] = hits_frame(index.search_shortlist(vector, skills[i], texts[i], k=k,
+                                                          score_threshold=score_threshold))
+        return frames
+    for i, hits in zip(present, index.search(vectors, k=k, score_threshold=score_threshold)):
+        frames[i] = hits_frame(hits)
+    return frames
+
+
+def match_resumes(resumes, index=None, k=TOP_K, score_threshold=SCORE_THRESHOLD, workers=BATCH_PARSE_WORKERS):
+    """Parse and match a list of resume PDFs (paths, bytes or uploaded files), in input order"""
+    parsed = parse_resumes(resumes, workers=workers)
+    texts = [resume_query_text(p) if p is not None else None for p in parsed]
+    skills = [resume_skills(p) if p is not None else set() for p in parsed] if SKILL_PREFILTER else None
+    return match_resume_texts(texts, index=index, k=k, score_threshold=score_threshold, skills=skills)
@@ -0,0 +1,87 @@
+"""Recall@k and query latency of the job_index index types against flat search.
+
+Vectors are synthetic (normalized points around random cluster centres, so
+neighbourhoods look more like real embeddings than uniform noise), which
+keeps the benchmark free of model downloads.
+
+    python -m benchmarks.ann_index --n 200000 --dim 768 --k 10
+"""
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def clustered_vectors(n, dim, n_clusters, seed):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(n_clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, n_clusters, size=n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def timed_search(index, queries, k):
+    """(ids, ms per query) searching one query at a time, as the app does"""
+    import numpy as np
+
+    ids = np.zeros((len(queries), k), dtype=np.int64)
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        _, ids[i:i + 1] = index.search(queries[i:i + 1], k)
+    return ids, 1000 * (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    import faiss
+    import numpy as np
+    from job_index import JOB_INDEX_TRAIN_SAMPLE, make_faiss_index, set_search_params
+
+    data = clustered_vectors(args.n, args.dim, n_clusters=max(10, args.n // 500), seed=0)
+    queries = clustered_vectors(args.queries, args.dim, n_clusters=max(10, args.n // 500), seed=0)
+    ids = np.arange(args.n, dtype=np.int64)
+
+    print(f"{args.n} vectors x {args.dim}, {args.queries} queries, k={args.k}")
+    print(f"{'index':<22} {'build s':>8} {'MB':>8} {'ms/query':>9} {f'recall@{args.k}':>10}")
+
+    truth = None
+    for index_type in ("flat", "hnsw", "ivfpq"):
+        index = make_faiss_index(index_type, args.dim, args.n)
+        start = time.perf_counter()
+        if not index.is_trained:
+            sample = data[np.random.default_rng(1).choice(args.n, min(args.n, JOB_INDEX_TRAIN_SAMPLE), replace=False)]
+            index.train(sample)
+        index.add_with_ids(data, ids)
+        build_seconds = time.perf_counter() - start
+        size_mb = faiss.serialize_index(index).nbytes / 2 ** 20
+
+        if index_type == "hnsw":
+            sweep = [(f"hnsw ef={ef}", {'ef_search': ef}) for ef in args.ef_search]
+        elif index_type == "ivfpq":
+            sweep = [(f"ivfpq nprobe={p}", {'nprobe': p}) for p in args.nprobe]
+        else:
+            sweep = [("flat", {})]
+        for label, params in sweep:
+            set_search_params(index, **params)
+            found, ms = timed_search(index, queries, args.k)
+            if truth is None:
+                truth = found
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(found, truth)])
+            print(f"{label:<22} {build_seconds:>8.1f} {size_mb:>8.0f} {ms:>9.3f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
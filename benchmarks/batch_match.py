@@ -0,0 +1,59 @@
+"""Resumes/sec for batch matching versus matching one resume at a time.
+
+Builds a throwaway job index from the synthetic corpus, then matches the
+same resume texts with batch_match.match_resume_texts and with a loop over
+JobIndex.search_text. Uses the configured embedding model; the embedding
+cache is off so both sides pay for encoding.
+
+    python -m benchmarks.batch_match --jobs 2000 --resumes 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("EMBED_CACHE", "0")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--resumes", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.0)
+    args = parser.parse_args()
+
+    from batch_match import match_resume_texts
+    from embeddings import warm_up
+    from job_corpus import synthetic_jobs, synthetic_resumes
+    from job_index import JobIndex
+    from job_parser import job_id
+
+    jobs = [dict(job, job_id=job_id(job)) for job in synthetic_jobs(args.jobs)]
+    resumes = synthetic_resumes(args.resumes)
+    warm_up()
+
+    index = JobIndex(tempfile.mkdtemp(prefix="batch_match_"))
+    start = time.perf_counter()
+    index.add(jobs)
+    print(f"indexed {len(index)} jobs in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    frames = match_resume_texts(resumes, index=index, k=args.k, score_threshold=args.threshold)
+    batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in resumes:
+        index.search_text(text, k=args.k, score_threshold=args.threshold)
+    single = time.perf_counter() - start
+
+    matched = sum(len(frame) for frame in frames)
+    print(f"batch:      {len(resumes) / batch:8.1f} resumes/s ({matched} matches)")
+    print(f"one by one: {len(resumes) / single:8.1f} resumes/s")
+
+
+if __name__ == "__main__":
+    main()
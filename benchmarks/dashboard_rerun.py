@@ -0,0 +1,92 @@
+"""Per-rerun data work of the results dashboard, before and after DashboardData.
+
+Streamlit reruns the whole script on every widget interaction. This times the
+pandas work one rerun used to do (value_counts, unique, isin filtering, two
+CSV exports, iterrows over the listing) against the cached DashboardData path
+(filter on categorical codes, slice one page, no export until asked for).
+
+    python -m benchmarks.dashboard_rerun --jobs 10000 --reruns 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def legacy_rerun(df):
+    """What display_results computed on every rerun before the refactor"""
+    df['source'].value_counts()
+    df['company'].value_counts().head(10)
+    sources = df['source'].unique()
+    companies = df['company'].unique()[:10]
+    locations = df['location'].unique()[:10]
+    filtered = df[df['source'].isin(sources)]
+    filtered = filtered[filtered['company'].isin(companies)]
+    filtered = filtered[filtered['location'].isin(locations)]
+    df.to_csv(index=False)
+    filtered.to_csv(index=False)
+    for _, job in filtered.iloc[:4].iterrows():
+        job.get('job_link', '#')
+    return len(filtered)
+
+
+def cached_rerun(data):
+    """What display_results computes on a rerun now that DashboardData is cached"""
+    data.aggregates()
+    positions = data.filter_positions({column: data.default_selection(column)
+                                       for column in ("source", "company", "location")})
+    data.page(positions, 1, 4)
+    return len(positions)
+
+
+def timed(fn, reruns):
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    from dashboard_data import DashboardData, dataset_version
+    from job_corpus import synthetic_jobs
+
+    df = pd.DataFrame(synthetic_jobs(args.jobs))
+
+    start = time.perf_counter()
+    dataset_version(df)
+    data = DashboardData(df)
+    data.aggregates()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    legacy_rows = legacy_rerun(df)
+    cached_rows = cached_rerun(data)
+    assert legacy_rows == cached_rows, (legacy_rows, cached_rows)
+
+    legacy_ms = timed(lambda: legacy_rerun(df), args.reruns)
+    cached_ms = timed(lambda: cached_rerun(data), args.reruns)
+    start = time.perf_counter()
+    data.csv_bytes()
+    export_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{args.jobs} jobs, {cached_rows} matching the default filters")
+    print(f"legacy rerun          {legacy_ms:8.1f} ms")
+    print(f"cached rerun          {cached_ms:8.1f} ms  ({legacy_ms / cached_ms:.0f}x)")
+    print(f"one-off build         {build_ms:8.1f} ms  (per dataset version)")
+    print(f"CSV export on demand  {export_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
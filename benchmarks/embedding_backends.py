@@ -0,0 +1,98 @@
+"""Embedding backends compared on a fixed job/resume set.
+
+Each configuration runs in its own process so memory numbers do not bleed
+into each other. Reports load time, docs/sec, peak RSS and the mean top-k
+overlap with the reference (all-mpnet-base-v2 on torch).
+
+    python -m benchmarks.embedding_backends --jobs 500 --resumes 50 --k 10
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+CONFIGS = [
+    ("mpnet", "torch"),
+    ("mpnet", "onnx"),
+    ("mpnet", "onnx-int8"),
+    ("small", "torch"),
+    ("small", "onnx-int8"),
+]
+
+
+def run_one(model, backend, n_jobs, n_resumes, k):
+    """Runs in the child process; prints one JSON line"""
+    from doc_loader import raw_job_text
+    from embeddings import MODEL_ALIASES, load_sentence_model
+    from job_corpus import synthetic_jobs, synthetic_resumes
+
+    jobs = [raw_job_text(job) for job in synthetic_jobs(n_jobs)]
+    resumes = synthetic_resumes(n_resumes)
+
+    start = time.perf_counter()
+    st_model = load_sentence_model(MODEL_ALIASES.get(model, model), backend)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    job_vectors = st_model.encode(jobs, batch_size=32, normalize_embeddings=True)
+    encode_seconds = time.perf_counter() - start
+    resume_vectors = st_model.encode(resumes, batch_size=32, normalize_embeddings=True)
+
+    top_k = (-(resume_vectors @ job_vectors.T)).argsort(axis=1)[:, :k].tolist()
+    print(json.dumps({
+        'load_seconds': load_seconds,
+        'docs_per_sec': len(jobs) / encode_seconds,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'top_k': top_k,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--resumes", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--configs", nargs="+", default=[f"{m}:{b}" for m, b in CONFIGS],
+                        help="model:backend pairs; the first one is the reference")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        model, backend = args.child.split(":")
+        run_one(model, backend, args.jobs, args.resumes, args.k)
+        return
+
+    results = {}
+    for config in args.configs:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.embedding_backends", "--child", config,
+             "--jobs", str(args.jobs), "--resumes", str(args.resumes), "--k", str(args.k)],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{config}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+            continue
+        results[config] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    if not results:
+        return
+    reference = results.get(args.configs[0])
+    print(f"{'config':<18} {'load s':>7} {'docs/s':>8} {'peak MB':>8} {f'top-{args.k} overlap':>15}")
+    for config, r in results.items():
+        if reference:
+            overlaps = [len(set(a) & set(b)) / args.k for a, b in zip(r['top_k'], reference['top_k'])]
+            overlap = f"{sum(overlaps) / len(overlaps):.3f}"
+        else:
+            overlap = "n/a"
+        print(f"{config:<18} {r['load_seconds']:>7.1f} {r['docs_per_sec']:>8.1f} "
+              f"{r['peak_rss_mb']:>8.0f} {overlap:>15}")
+
+
+if __name__ == "__main__":
+    main()
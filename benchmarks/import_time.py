@@ -0,0 +1,64 @@
+"""Import-time budget check for the dashboard's own modules.
+
+Runs a fresh interpreter with ``-X importtime`` and fails when importing the
+app modules takes longer than the budget.
+
+    python -m benchmarks.import_time --budget-ms 300
+    python -m benchmarks.import_time --modules main --budget-ms 2500
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["doc_loader", "job_parser", "resume_parser"]
+
+
+def measure(modules):
+    """Return (total_us, [(cumulative_us, name), ...]) for importing modules in a clean process"""
+    code = "; ".join(f"import {m}" for m in modules) or "pass"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{proc.stderr}")
+
+    top_level = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; only top-level entries add up to the total
+        if not name.startswith("  ", 1):
+            top_level.append((int(cumulative), name.strip()))
+    return sum(us for us, _ in top_level), top_level
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "300")))
+    parser.add_argument("--runs", type=int, default=3, help="best of N cold starts")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # Interpreter startup (site, encodings, ...) is measured separately and subtracted
+    baseline_us = min(measure([])[0] for _ in range(args.runs))
+    runs = [measure(args.modules) for _ in range(args.runs)]
+    total_us, top_level = min(runs, key=lambda r: r[0])
+    total_ms = (total_us - baseline_us) / 1000
+
+    print(f"Importing {', '.join(args.modules)}: {total_ms:.1f} ms (best of {args.runs})")
+    for us, name in sorted(top_level, reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    if total_ms > args.budget_ms:
+        print(f"FAIL: over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+    print(f"OK: within the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Ingest and dashboard-query latency of the DuckDB job history.
+
+Bulk-loads --days days of synthetic postings (--per-day each) into a
+throwaway history directory as Parquet parts, and times the first rollup
+refresh over all of them. It then times appending scrape-sized batches
+(--scrape-size rows) on top of that, which is the incremental cost paid per
+search. Last come the dashboard panel queries and an ad-hoc query over the
+raw Parquet log.
+
+    python -m benchmarks.job_history --days 100 --per-day 10000
+"""
+import argparse
+from datetime import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def timed(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--per-day", type=int, default=10000)
+    parser.add_argument("--scrape-size", type=int, default=200)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    from job_corpus import synthetic_jobs
+    from job_history import JobHistory, history_frame
+
+    history = JobHistory(tempfile.mkdtemp(prefix="job_history_"))
+    now = time.time()
+    template = history_frame(pd.DataFrame(synthetic_jobs(args.per_day)), now)
+
+    # Parsing rows in Python is the same per row however big the history is, so build one
+    # day of rows once and write it out with shifted dates
+    import duckdb
+
+    start = time.perf_counter()
+    con = duckdb.connect()
+    con.register("template", template)
+    for day in range(1, args.days + 1):
+        when = datetime.fromtimestamp(now - day * 86400)
+        directory = os.path.join(history.parts_dir, when.strftime("%Y-%m-%d"))
+        os.makedirs(directory, exist_ok=True)
+        con.execute(f"""
+            COPY (SELECT * REPLACE ('{when.date()}'::DATE AS day, '{when}'::TIMESTAMP AS scraped_at) FROM template)
+            TO '{os.path.join(directory, "bulk.parquet")}' (FORMAT PARQUET)
+        """)
+    con.close()
+    print(f"wrote {args.days * args.per_day} rows in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    parts = history.refresh()
+    print(f"first rollup refresh over {parts} parts: {time.perf_counter() - start:.1f}s")
+
+    scrapes = pd.DataFrame(synthetic_jobs(args.scrape_size * 5, seed=1))
+    append_ms = []
+    for i in range(5):
+        start = time.perf_counter()
+        history.append(scrapes.iloc[i * args.scrape_size:(i + 1) * args.scrape_size], now + i)
+        append_ms.append((time.perf_counter() - start) * 1000)
+    print(f"append of a {args.scrape_size}-row scrape incl. rollup refresh: "
+          f"median {statistics.median(append_ms):.0f} ms")
+
+    queries = {
+        "jobs per day": lambda: history.jobs_per_day(days=args.days + 1),
+        "top skills": lambda: history.top_skills(days=args.days + 1),
+        "top companies": lambda: history.top("company", days=args.days + 1),
+        "salary/experience by location": lambda: history.ranges("location", days=args.days + 1),
+        "raw log: distinct postings": lambda: history.query("SELECT count(DISTINCT job_id) FROM jobs"),
+    }
+    for name, query in queries.items():
+        print(f"{name:32s} {timed(query):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Latency and throughput of job enrichment and resume parsing.
+
+Uses the replay backend so numbers are reproducible offline: a replay file
+is generated for a synthetic job set and every call sleeps --latency-ms to
+simulate the model. Pass --backend local (or remote) to time a real model
+against the same inputs instead.
+
+    python -m benchmarks.llm_latency --jobs 200 --latency-ms 50
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+RESUME_TEXT = """Jane Doe
+Senior Data Engineer at Example Corp (2019 - present)
+Skills: Python, SQL, Spark, Airflow, AWS
+Certifications: AWS Certified Data Analytics
+"""
+
+
+def write_replay_file(path, df):
+    import job_parser
+    import resume_parser
+    from llm_backends import prompt_key
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(len(df)):
+            row = df.iloc[i]
+            body = json.dumps({'title': row['title'], 'company': row['company'], 'location': row['location'],
+                               'skills': list(row['skills'])}, ensure_ascii=False)
+            record = {'key': prompt_key(job_parser.prompt.replace('##input_job##', str(row))),
+                      'content': f"```json\n{body}\n```"}
+            f.write(json.dumps(record) + "\n")
+        resume_prompt = resume_parser.prompt.replace('##input_resume##', RESUME_TEXT)
+        resume_prompt = resume_prompt.replace('##date##', str(resume_parser.today))
+        record = {'key': prompt_key(resume_prompt),
+                  'content': "```python\n{'Name': 'Jane Doe', 'Skills': ['Python', 'SQL', 'Spark']}\n```"}
+        f.write(json.dumps(record) + "\n")
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--resume-runs", type=int, default=5)
+    parser.add_argument("--backend", default="replay", choices=["replay", "local", "remote"])
+    args = parser.parse_args()
+
+    import pandas as pd
+    import job_parser
+    import resume_parser
+    from job_corpus import synthetic_jobs
+    from llm_backends import ReplayBackend, get_llm
+
+    workdir = tempfile.mkdtemp(prefix="llm_bench_")
+    df = pd.DataFrame(synthetic_jobs(args.jobs))
+    if args.backend == "replay":
+        replay_path = os.path.join(workdir, "replay.jsonl")
+        write_replay_file(replay_path, df)
+        backend = ReplayBackend(replay_path, latency_ms=args.latency_ms)
+    else:
+        backend = get_llm(args.backend)
+    # Both parsers look the backend up through get_llm(); pin it for this process
+    job_parser.get_llm = resume_parser.get_llm = lambda: backend
+
+    jobs, elapsed = timed(job_parser.get_job_list, df, checkpoint_dir=os.path.join(workdir, "ckpt"))
+    print(f"enrichment: {len(jobs)}/{len(df)} jobs in {elapsed:.2f}s "
+          f"({len(df) / elapsed:.1f} jobs/s, {1000 * elapsed / len(df):.1f} ms/job)")
+
+    _, resumed = timed(job_parser.get_job_list, df, checkpoint_dir=os.path.join(workdir, "ckpt"))
+    print(f"enrichment rerun from checkpoint: {resumed:.3f}s")
+
+    samples = [timed(resume_parser.parse_resume_text, RESUME_TEXT)[1] for _ in range(args.resume_runs)]
+    print(f"resume parse: median {1000 * statistics.median(samples):.1f} ms, "
+          f"max {1000 * max(samples):.1f} ms over {len(samples)} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Load test of the HTTP API against local stand-ins for the job boards and the LLM.
+
+Starts api.app under uvicorn in this process. Scraping uses the stub scraper
+(JOB_SCRAPER=stub) and the LLM uses the replay backend, with a replay file
+generated for the stub postings and the test resume. The embedding model is
+the real one. All caches and indexes go to a throwaway directory.
+
+--clients concurrent clients each submit searches over --titles distinct job
+titles (identical searches share one scrape) and read every result stream to
+the end. Every --resume-every-th search uploads the resume, which enriches the
+scraped jobs and adds them to the job index. --matches /match requests then
+run against that index. The report covers throughput, 429s, and latency
+percentiles for submitting, the first job event and the full stream.
+
+    python -m benchmarks.load_test --searches 200 --clients 32 --titles 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+TITLES = ["Data Engineer", "Python Developer", "Backend Engineer", "ML Engineer", "Frontend Developer",
+          "DevOps Engineer", "Data Scientist", "Java Developer", "QA Engineer", "Cloud Architect"]
+
+
+def configure(workdir, args):
+    """Point every cache at workdir and select the stand-ins; must run before the app modules import"""
+    os.environ.update({
+        "JOB_SCRAPER": "stub",
+        "STUB_SCRAPER_PAGE_MS": str(args.page_ms),
+        "LLM_BACKEND": "replay",
+        "LLM_REPLAY_PATH": os.path.join(workdir, "replay.jsonl"),
+        "LLM_REPLAY_LATENCY_MS": str(args.llm_latency_ms),
+        "RESULT_CACHE_DIR": os.path.join(workdir, "results"),
+        "JOB_INDEX_DIR": os.path.join(workdir, "index"),
+        "EMBED_CACHE_DIR": os.path.join(workdir, "embeddings"),
+        "ENRICH_CHECKPOINT_DIR": os.path.join(workdir, "enrichment"),
+        "RESUME_CACHE_DIR": os.path.join(workdir, "resumes"),
+        "JOB_HISTORY_DIR": os.path.join(workdir, "history"),
+        "WORKER_THREADS": str(args.workers),
+        "MAX_QUEUED_JOBS": str(args.max_queued),
+        "API_WARM_UP": "1",
+    })
+
+
+def write_replay_file(path, titles, max_pages, resume_pdf):
+    """Replay records for every stub posting of the given searches and for the resume"""
+    import job_parser
+    import resume_parser
+    from llm_backends import prompt_key
+    from pdf_extract import extract_with_stats
+    from stub_scraper import StubJobScraper
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for title in titles:
+            df = StubJobScraper().scrape_all_jobs(title, "", max_pages)
+            for i in range(len(df)):
+                row = df.iloc[i]
+                body = json.dumps({'title': row['title'], 'company': row['company'], 'location': row['location'],
+                                   'skills': list(row['skills'])}, ensure_ascii=False)
+                record = {'key': prompt_key(job_parser.prompt.replace('##input_job##', str(row))),
+                          'content': f"```json\n{body}\n```"}
+                f.write(json.dumps(record) + "\n")
+        text, _ = extract_with_stats(resume_pdf)
+        resume_prompt = resume_parser.prompt.replace('##input_resume##', text)
+        resume_prompt = resume_prompt.replace('##date##', str(resume_parser.today))
+        record = {'key': prompt_key(resume_prompt),
+                  'content': "```python\n{'Name': 'Jane Doe', 'Skills': ['Python', 'SQL', 'Spark', 'Kafka']}\n```"}
+        f.write(json.dumps(record) + "\n")
+
+
+def start_server(port):
+    import uvicorn
+
+    from api import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="api-server", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def percentiles(samples):
+    if not samples:
+        return "n/a"
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"p50 {statistics.median(samples) * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms"
+
+
+async def run_search(client, i, args, resume_pdf, stats):
+    data = {'job_title': TITLES[i % args.titles], 'max_pages': str(args.max_pages)}
+    files = {'resume': ("resume.pdf", resume_pdf, "application/pdf")} \
+        if args.resume_every and i % args.resume_every == 0 else None
+    start = time.perf_counter()
+    response = await client.post("/searches", data=data, files=files)
+    stats['submit'].append(time.perf_counter() - start)
+    if response.status_code == 429:
+        stats['rejected'] += 1
+        return
+    response.raise_for_status()
+
+    first_job = None
+    async with client.stream("GET", response.json()['results_url']) as stream:
+        if stream.status_code == 429:
+            stats['rejected'] += 1
+            return
+        async for line in stream.aiter_lines():
+            event = json.loads(line)
+            if event['event'] == "job" and first_job is None:
+                first_job = time.perf_counter() - start
+            elif event['event'] == "match":
+                stats['match_events'] += 1
+            elif event['event'] == "error":
+                stats['errors'].append(event['data']['error'])
+            elif event['event'] == "summary" and event['data']['ai_error']:
+                stats['errors'].append(f"AI matching: {event['data']['ai_error']}")
+    if first_job is not None:
+        stats['first_job'].append(first_job)
+    stats['complete'].append(time.perf_counter() - start)
+
+
+async def run_match(client, resume_pdf, stats):
+    start = time.perf_counter()
+    response = await client.post("/match", files={'resume': ("resume.pdf", resume_pdf, "application/pdf")})
+    if response.status_code == 429:
+        stats['rejected'] += 1
+        return
+    if response.status_code != 200:
+        stats['errors'].append(response.text)
+        return
+    stats['match'].append(time.perf_counter() - start)
+
+
+async def drive(port, args, resume_pdf):
+    import httpx
+
+    stats = {'submit': [], 'first_job': [], 'complete': [], 'match': [], 'rejected': 0, 'match_events': 0,
+             'errors': []}
+    limits = httpx.Limits(max_connections=args.clients)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=300, limits=limits) as client:
+        gate = asyncio.Semaphore(args.clients)
+
+        async def one(coro):
+            async with gate:
+                await coro
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(run_search(client, i, args, resume_pdf, stats)) for i in range(args.searches)))
+        search_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        await asyncio.gather(*(one(run_match(client, resume_pdf, stats)) for _ in range(args.matches)))
+        match_seconds = time.perf_counter() - start
+        health = (await client.get("/health")).json()
+    return stats, search_seconds, match_seconds, health
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--searches", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--titles", type=int, default=5, help=f"distinct searches, at most {len(TITLES)}")
+    parser.add_argument("--max-pages", type=int, default=2)
+    parser.add_argument("--resume-every", type=int, default=4, help="0 to never upload the resume")
+    parser.add_argument("--matches", type=int, default=20)
+    parser.add_argument("--page-ms", type=float, default=200, help="stub scraper time per results page")
+    parser.add_argument("--llm-latency-ms", type=float, default=20, help="replay backend time per call")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-queued", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    args.titles = max(1, min(args.titles, len(TITLES)))
+
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    configure(workdir, args)
+
+    from benchmarks.pdf_extraction import make_pdf
+
+    resume_pdf = make_pdf(1)
+    write_replay_file(os.environ["LLM_REPLAY_PATH"], TITLES[:args.titles], args.max_pages, resume_pdf)
+    server, thread = start_server(args.port)
+    try:
+        stats, search_seconds, match_seconds, health = asyncio.run(drive(args.port, args, resume_pdf))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    done = len(stats['complete'])
+    print(f"searches: {done}/{args.searches} streamed in {search_seconds:.1f}s "
+          f"({done / search_seconds:.1f}/s) with {args.clients} clients over {args.titles} titles")
+    print(f"  submit      {percentiles(stats['submit'])}")
+    print(f"  first job   {percentiles(stats['first_job'])}")
+    print(f"  full stream {percentiles(stats['complete'])}")
+    print(f"  AI matches streamed: {stats['match_events']}")
+    if args.matches:
+        print(f"/match: {len(stats['match'])}/{args.matches} in {match_seconds:.1f}s  {percentiles(stats['match'])}")
+    print(f"rejected (429): {stats['rejected']}, errors: {len(stats['errors'])}")
+    for error in sorted(set(stats['errors']))[:5]:
+        print(f"  {error[:200]}")
+    print(f"worker pool: {health['jobs']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Resume PDF extraction: time and peak memory per mode.
+
+Peak memory is the tracemalloc peak in this process, so for the parallel
+variants it excludes the worker processes. Sample resumes are generated locally (plain PDF, no extra dependencies) at
+several page counts, with a two-column skills grid on every page to give
+layout analysis something to chew on.
+
+    python -m benchmarks.pdf_extraction --pages 1 3 10 40
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+SKILLS = ["Python", "SQL", "Spark", "Airflow", "AWS", "Docker", "Kubernetes", "Kafka", "Pandas", "dbt"]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(page_no):
+    ops = ["BT /F1 11 Tf 14 TL 50 790 Td"]
+    ops.append(f"(Jane Doe - Curriculum Vitae - page {page_no + 1}) Tj T*")
+    for i in range(30):
+        ops.append(f"(Senior Data Engineer, Example Corp {i}: built batch and streaming pipelines "
+                   f"processing {i * 10} TB/day with Spark and Kafka.) ' ")
+    ops.append("ET")
+    # Individually positioned fragments, like a table or a two-column template
+    for row in range(20):
+        for col, skill in enumerate(SKILLS):
+            x, y = 50 + col * 52, 330 - row * 14
+            ops.append(f"BT /F1 8 Tf {x} {y} Td ({_escape(skill)} {row}) Tj ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def make_pdf(n_pages):
+    """Bytes of an n-page PDF with text on every page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_no in range(n_pages):
+        stream = _page_stream(page_no)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % n_pages
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 3, 10, 40])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-pages", type=int, default=0, help="page cap, 0 for none")
+    args = parser.parse_args()
+
+    from pdfminer.high_level import extract_text
+    from pdf_extract import MODES, PDF_WORKERS, extract_with_stats
+
+    print(f"{'pages':>5}  {'variant':<22} {'median s':>9} {'peak MB':>8} {'chars':>8}")
+    for n_pages in args.pages:
+        data = make_pdf(n_pages)
+
+        samples = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            text = extract_text(io.BytesIO(data), codec='utf-8')
+            samples.append(time.perf_counter() - start)
+        print(f"{n_pages:>5}  {'extract_text (before)':<22} {statistics.median(samples):>9.3f} {'':>8} {len(text):>8}")
+
+        for mode in MODES:
+            for workers in sorted({1, PDF_WORKERS}):
+                runs = [extract_with_stats(data, mode=mode, max_pages=args.max_pages, workers=workers)
+                        for _ in range(args.runs)]
+                seconds = statistics.median(stats['seconds'] for _, stats in runs)
+                # Memory is traced in a separate run; tracemalloc would distort the timings
+                _, traced = extract_with_stats(data, mode=mode, max_pages=args.max_pages, workers=workers,
+                                               trace_memory=True)
+                peak = traced['traced_peak_mb']
+                label = f"{mode} x{workers}"
+                print(f"{n_pages:>5}  {label:<22} {seconds:>9.3f} {peak:>8.1f} {len(runs[0][0]):>8}")
+
+
+if __name__ == "__main__":
+    main()
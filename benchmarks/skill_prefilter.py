@@ -0,0 +1,65 @@
+"""Skill/BM25 shortlist + dense re-ranking versus full dense search.
+
+Builds a throwaway index (and embedding cache) from the synthetic corpus and
+reports per-resume latency and top-k agreement with the full dense search.
+
+    python -m benchmarks.skill_prefilter --jobs 20000 --resumes 100 --shortlist 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("EMBED_CACHE_DIR", tempfile.mkdtemp(prefix="skill_prefilter_cache_"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--resumes", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--shortlist", type=int, default=200)
+    args = parser.parse_args()
+
+    from embeddings import embed_texts
+    from job_corpus import synthetic_jobs, synthetic_resumes
+    from job_index import JobIndex
+    from job_parser import job_id
+    from skill_index import resume_skills
+
+    jobs = [dict(job, job_id=job_id(job)) for job in synthetic_jobs(args.jobs)]
+    resumes = synthetic_resumes(args.resumes)
+    index = JobIndex(tempfile.mkdtemp(prefix="skill_prefilter_"))
+    start = time.perf_counter()
+    index.add(jobs)
+    print(f"indexed {len(index)} jobs in {time.perf_counter() - start:.1f}s")
+
+    vectors = embed_texts(resumes)
+    dense_ms, short_ms, overlaps, shortlist_sizes = [], [], [], []
+    for text, vector in zip(resumes, vectors):
+        skills = resume_skills(text)
+
+        start = time.perf_counter()
+        dense = index.search([vector], k=args.k)[0]
+        dense_ms.append(1000 * (time.perf_counter() - start))
+
+        start = time.perf_counter()
+        short = index.search_shortlist(vector, skills, text, k=args.k, shortlist_size=args.shortlist)
+        short_ms.append(1000 * (time.perf_counter() - start))
+
+        shortlist_sizes.append(len(index.skills.shortlist(skills, text, size=args.shortlist)))
+        dense_ids = {job['job_id'] for job, _ in dense}
+        overlaps.append(len(dense_ids & {job['job_id'] for job, _, _ in short}) / args.k)
+
+    print(f"full dense search: median {statistics.median(dense_ms):.2f} ms/resume")
+    print(f"skill shortlist:   median {statistics.median(short_ms):.2f} ms/resume "
+          f"(shortlist {statistics.median(shortlist_sizes):.0f} of {len(index)})")
+    print(f"top-{args.k} overlap with full dense search: {statistics.mean(overlaps):.3f}")
+
+
+if __name__ == "__main__":
+    main()
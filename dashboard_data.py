@@ -0,0 +1,105 @@
+"""Precomputed views of a job DataFrame for the dashboard.
+
+Everything here is computed once per dataset version and reused across
+Streamlit reruns: categorical codes for the filter columns, the chart
+aggregates and CSV exports for a given filter selection.
+"""
+from collections import OrderedDict
+import hashlib
+import threading
+
+FILTER_COLUMNS = ("source", "company", "location")
+# The multiselects start with this many companies/locations selected
+DEFAULT_SELECTED = 10
+# CSV exports kept per dataset (the full listing and the latest filter selection)
+MAX_EXPORTS = 2
+
+
+def dataset_version(df):
+    """Content hash of df, stable across sessions for identical results"""
+    import pandas as pd
+
+    if df is None or df.empty:
+        return "empty"
+    # Every column counts: enrichment can change descriptions or skills of the same postings.
+    # astype(str) because list cells (skills) are not hashable.
+    hashed = pd.util.hash_pandas_object(df.astype(str), index=False).values
+    digest = hashlib.sha1("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(hashed.tobytes())
+    return digest.hexdigest()[:16] + f"-{len(df)}"
+
+
+class DashboardData:
+    def __init__(self, df):
+        import pandas as pd
+
+        self.df = df
+        self.codes = {}
+        self.categories = {}
+        for column in FILTER_COLUMNS:
+            if column in df.columns:
+                # Categories in order of first appearance, like Series.unique()
+                codes, uniques = pd.factorize(df[column], use_na_sentinel=True)
+                self.codes[column] = codes
+                self.categories[column] = list(uniques)
+        self._aggregates = None
+        self._exports = OrderedDict()
+        self._lock = threading.Lock()
+
+    def options(self, column):
+        return self.categories.get(column, [])
+
+    def default_selection(self, column):
+        options = self.options(column)
+        return options if column == "source" else options[:DEFAULT_SELECTED]
+
+    def filter_positions(self, selections):
+        """Row positions matching every {column: selected values}; empty selections don't filter"""
+        import numpy as np
+
+        mask = np.ones(len(self.df), dtype=bool)
+        for column, selected in selections.items():
+            if column not in self.codes or (not selected and column != "source"):
+                continue
+            lookup = {value: code for code, value in enumerate(self.categories[column])}
+            wanted = np.array([lookup[v] for v in selected if v in lookup], dtype=self.codes[column].dtype)
+            mask &= np.isin(self.codes[column], wanted)
+        return np.flatnonzero(mask)
+
+    def aggregates(self):
+        """Jobs per source and the top 10 companies, computed once"""
+        import numpy as np
+        import pandas as pd
+
+        with self._lock:
+            if self._aggregates is None:
+                aggregates = {}
+                for column in ("source", "company"):
+                    if column in self.codes:
+                        codes = self.codes[column]
+                        counts = np.bincount(codes[codes >= 0], minlength=len(self.categories[column]))
+                        series = pd.Series(counts, index=self.categories[column]).sort_values(ascending=False,
+                                                                                              kind="stable")
+                        aggregates[column] = series[series > 0]
+                if "company" in aggregates:
+                    aggregates["company"] = aggregates["company"].head(10)
+                self._aggregates = aggregates
+            return self._aggregates
+
+    def page(self, positions, page, per_page):
+        """Rows for a 1-based page of the filtered positions"""
+        start = (page - 1) * per_page
+        return self.df.iloc[positions[start:start + per_page]]
+
+    def csv_bytes(self, positions=None):
+        """CSV export of the given rows (all rows by default); the last MAX_EXPORTS selections are kept"""
+        key = None if positions is None else hashlib.sha1(positions.tobytes()).hexdigest()
+        with self._lock:
+            if key in self._exports:
+                self._exports.move_to_end(key)
+            else:
+                rows = self.df if positions is None else self.df.iloc[positions]
+                self._exports[key] = rows.to_csv(index=False).encode("utf-8")
+                while len(self._exports) > MAX_EXPORTS:
+                    self._exports.popitem(last=False)
+            return self._exports[key]
@@ -1,46 +1,111 @@
-from langchain_community.document_loaders import CSVLoader
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from job_parser import get_job_list
-from langchain_core.documents import Document
-from resume_parser import get_resume
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from embeddings import embed_texts
+from job_index import get_job_index, relevance
+from job_parser import get_job_list, job_id
+from resume_parser import get_resume, resume_query_text
+from skill_index import resume_skills
 import os
+import time
 from dotenv import load_dotenv
 load_dotenv()
 hf_token = os.getenv("HF_TOKEN")
 
+# enrich_first: LLM-parse every scraped job, then match (load_docs)
+# embed_first: match on the raw scraped fields, then LLM-parse only the top k (match_then_enrich)
+MATCH_MODE = os.getenv("MATCH_MODE", "enrich_first")
+TOP_K = 4
+SCORE_THRESHOLD = 0.4
+# Shortlist jobs by skill overlap / BM25 before dense scoring (job_index.JobIndex.search_shortlist)
+SKILL_PREFILTER = os.getenv("SKILL_PREFILTER", "0") == "1"
 
-# Load the model
+RAW_JOB_TEMPLATE = "title: {title}\ncompany: {company}\nskills: {skills}\ndescription: {description}"
 
+_enrich_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="enrich")
 
-model_name = "sentence-transformers/all-mpnet-base-v2"
 
 def load_docs(resume,df):
     print("--------loading docs-------")
     job_list=get_job_list(df)
-    documents = []
+    if not job_list:
+        raise ValueError("None of the scraped jobs could be enriched; rerun to retry the failed ones")
 
-    for job in job_list:
-        print(f"---Processing job for {job}")
-        # You can customize this: serialize full dict or format selected fields
-        text = "\n".join(f"{k}: {v}" for k, v in job.items())
-        
-        doc = Document(page_content=text, metadata=job)  # you can keep job dict in metadata too
-        documents.append(doc)
-
-
-    embedding_model = HuggingFaceEmbeddings(model_name=model_name)
-    vector_store = FAISS.from_documents(documents,embedding_model)
-
-    # vector_store = FAISS.from_documents(sentence_embedding, data)
-    retriever = vector_store.as_retriever(    search_type="similarity_score_threshold",
-        search_kwargs={"score_threshold": 0.4, "k": 4})
+    # Only postings the persistent index has not seen before get embedded; both calls save the index
+    index = get_job_index()
+    expired = index.expire()
+    added = index.add(job_list)
+    print(f"---Job index: {added} added, {expired} expired, {len(index)} total---")
 
     resume_content=get_resume(resume)
-    res=retriever.invoke(resume_content)
-    df = pd.DataFrame([doc.metadata for doc in res])
+    query = resume_query_text(resume_content)
+    if SKILL_PREFILTER:
+        res = index.search_shortlist(embed_texts([query])[0], resume_skills(resume_content), query,
+                                     k=TOP_K, score_threshold=SCORE_THRESHOLD)
+    else:
+        res = index.search_text(query, k=TOP_K, score_threshold=SCORE_THRESHOLD)
+    df = hits_frame(res)
     print("---Completed AI Job matching---")
     return df
 
 
+def hits_frame(hits):
+    """DataFrame of matched jobs with a score column, plus skill overlap columns for shortlist hits"""
+    import pandas as pd
+
+    rows = []
+    for hit in hits:
+        job, score = hit[0], hit[1]
+        row = dict(job, score=score)
+        if len(hit) > 2:
+            row['skill_overlap'] = len(hit[2])
+            row['matched_skills'] = ", ".join(sorted(hit[2]))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def raw_job_text(job):
+    """Embedding text for a scraped row, built without the LLM"""
+    def field(name):
+        value = job.get(name, '')
+        return '' if value is None or value == 'N/A' else str(value)
+
+    return RAW_JOB_TEMPLATE.format(title=field('title'), company=field('company'),
+                                   skills=field('skills_text'), description=field('description'))
+
+
+def match_raw_jobs(resume, df, k=TOP_K, score_threshold=SCORE_THRESHOLD):
+    """Top-k scraped rows for the resume by embedding similarity, with score and job_id columns"""
+    import numpy as np
+
+    rows = [df.iloc[i] for i in range(len(df))]
+    job_vectors = embed_texts([raw_job_text(row) for row in rows])
+    query = embed_texts([resume_query_text(get_resume(resume))])[0]
+
+    scores = np.array([relevance(float(sim)) for sim in job_vectors @ query])
+    top = [i for i in np.argsort(-scores)[:k] if scores[i] >= score_threshold]
+    matches = df.iloc[top].copy()
+    matches['job_id'] = [job_id(rows[i]) for i in top]
+    matches['score'] = scores[top]
+    return matches.reset_index(drop=True)
+
+
+def enrich_matches(matches):
+    """LLM-parse the matched rows; rows that fail keep their scraped fields"""
+    import pandas as pd
+
+    scraped = matches.drop(columns=['job_id', 'score'])
+    enriched = {job['job_id']: job for job in get_job_list(scraped)}
+    rows = []
+    for _, row in matches.iterrows():
+        job = enriched.get(row['job_id'])
+        # Fall back to the scraped value for anything the model left out
+        rows.append(dict(row.to_dict(), **job) if job else row.to_dict())
+    return pd.DataFrame(rows)
+
+
+def match_then_enrich(resume, df, k=TOP_K, score_threshold=SCORE_THRESHOLD):
+    """Embed-first matching: returns the raw top-k now and a future for their enriched version"""
+    print("--------matching scraped jobs-------")
+    start = time.perf_counter()
+    matches = match_raw_jobs(resume, df, k=k, score_threshold=score_threshold)
+    print(f"---First matches in {time.perf_counter() - start:.2f}s, enriching {len(matches)} in background---")
+    return matches, _enrich_pool.submit(enrich_matches, matches)
@@ -0,0 +1,195 @@
+"""Memory-mapped cache of text embeddings, keyed by a hash of the text.
+
+Vectors live in one flat array file that every process maps read-only, so
+the OS page cache holds a single copy however many workers read it. New
+vectors are appended under an exclusive file lock together with a line in
+an append-only index log (hash -> row), which other processes pick up on
+their next lookup. Each model key (see embeddings.model_key) gets its own
+subdirectory. job_index.JobIndex.expire compacts the cache down to the vectors
+of the jobs still indexed plus anything written in the last
+EMBED_CACHE_MAX_AGE_DAYS.
+
+EMBED_CACHE_DIR           root directory (default .cache/embeddings)
+EMBED_CACHE_DTYPE         float32 or float16
+EMBED_CACHE_MAX_AGE_DAYS  how long compaction keeps vectors nothing else needs
+"""
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", os.path.join(".cache", "embeddings"))
+EMBED_CACHE_DTYPE = os.getenv("EMBED_CACHE_DTYPE", "float32")
+EMBED_CACHE_MAX_AGE_DAYS = float(os.getenv("EMBED_CACHE_MAX_AGE_DAYS", "30"))
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, model_key, dim, directory=EMBED_CACHE_DIR, dtype=EMBED_CACHE_DTYPE):
+        import numpy as np
+
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.directory = os.path.join(directory, model_key, f"{dim}-{self.dtype.name}")
+        self.vectors_path = os.path.join(self.directory, "vectors.bin")
+        self.index_path = os.path.join(self.directory, "index.jsonl")
+        self.lock_path = os.path.join(self.directory, "lock")
+        self.generation_path = os.path.join(self.directory, "generation")
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.rows = {}
+        self.written_at = {}
+        self._generation = None
+        self._index_offset = 0
+        self._mmap = None
+        self._mmap_rows = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _file_lock(self, exclusive):
+        f = open(self.lock_path, 'a')
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return f
+
+    def _read_generation(self):
+        if not os.path.exists(self.generation_path):
+            return 0
+        with open(self.generation_path, encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+
+    def _refresh(self):
+        """Pick up rows appended by this or other processes since the last look"""
+        import numpy as np
+
+        generation = self._read_generation()
+        if generation != self._generation:
+            # First look, or another process compacted the files: row numbers changed
+            self.rows, self.written_at, self._index_offset, self._mmap, self._mmap_rows = {}, {}, 0, None, 0
+            self._generation = generation
+        if os.path.exists(self.index_path) and os.path.getsize(self.index_path) != self._index_offset:
+            with open(self.index_path, encoding='utf-8') as f:
+                f.seek(self._index_offset)
+                for line in f:
+                    if not line.endswith("\n"):
+                        break
+                    record = json.loads(line)
+                    self.rows[record['h']] = record['r']
+                    self.written_at[record['h']] = record.get('t', 0)
+                    self._index_offset += len(line.encode('utf-8'))
+        n_rows = os.path.getsize(self.vectors_path) // (self.dim * self.dtype.itemsize) \
+            if os.path.exists(self.vectors_path) else 0
+        if n_rows != self._mmap_rows:
+            self._mmap = np.memmap(self.vectors_path, dtype=self.dtype, mode='r', shape=(n_rows, self.dim)) \
+                if n_rows else None
+            self._mmap_rows = n_rows
+
+    def get_many(self, hashes):
+        """(vectors, found) where found[i] says whether hashes[i] was cached; missing rows are zero"""
+        import numpy as np
+
+        with self._lock:
+            lock = self._file_lock(exclusive=False)
+            try:
+                self._refresh()
+            finally:
+                lock.close()
+            vectors = np.zeros((len(hashes), self.dim), dtype=np.float32)
+            found = np.zeros(len(hashes), dtype=bool)
+            for i, h in enumerate(hashes):
+                row = self.rows.get(h)
+                if row is not None and row < self._mmap_rows:
+                    vectors[i] = self._mmap[row]
+                    found[i] = True
+            self.hits += int(found.sum())
+            self.misses += len(hashes) - int(found.sum())
+            return vectors, found
+
+    def put_many(self, hashes, vectors):
+        """Append vectors for hashes not cached yet"""
+        import numpy as np
+
+        vectors = np.asarray(vectors, dtype=self.dtype)
+        with self._lock:
+            lock = self._file_lock(exclusive=True)
+            try:
+                self._refresh()
+                fresh = {}
+                for h, v in zip(hashes, vectors):
+                    if h not in self.rows and h not in fresh:
+                        fresh[h] = v
+                if not fresh:
+                    return 0
+                start = self._mmap_rows
+                now = time.time()
+                with open(self.vectors_path, 'ab') as f:
+                    # Cut off a partial row left by an interrupted append, or every later row is misaligned
+                    f.truncate(start * self.dim * self.dtype.itemsize)
+                    f.write(np.stack(list(fresh.values())).tobytes())
+                # Rows are written before the index lines that point at them
+                with open(self.index_path, 'a', encoding='utf-8') as f:
+                    # Likewise a torn last line; _refresh stopped reading just before it
+                    f.truncate(self._index_offset)
+                    for offset, h in enumerate(fresh):
+                        f.write(json.dumps({'h': h, 'r': start + offset, 't': now}) + "\n")
+                self._refresh()
+                return len(fresh)
+            finally:
+                lock.close()
+
+    def compact(self, keep_hashes=None, max_age_days=None):
+        """Rewrite the files without duplicate or unwanted rows; returns the new row count.
+
+        With neither argument every hash is kept. Otherwise a hash is kept if it is in
+        keep_hashes or was written within max_age_days.
+        """
+        import numpy as np
+
+        cutoff = None if max_age_days is None else time.time() - max_age_days * 86400
+
+        def wanted(h):
+            if keep_hashes is None and cutoff is None:
+                return True
+            return (keep_hashes is not None and h in keep_hashes) or \
+                (cutoff is not None and self.written_at.get(h, 0) >= cutoff)
+
+        with self._lock:
+            lock = self._file_lock(exclusive=True)
+            try:
+                self._refresh()
+                keep = [h for h in self.rows if wanted(h)]
+                keep = [h for h in keep if self.rows[h] < self._mmap_rows]
+                data = np.array(self._mmap[[self.rows[h] for h in keep]]) if keep else \
+                    np.zeros((0, self.dim), dtype=self.dtype)
+
+                tmp_vectors = self.vectors_path + ".tmp"
+                tmp_index = self.index_path + ".tmp"
+                with open(tmp_vectors, 'wb') as f:
+                    f.write(data.tobytes())
+                with open(tmp_index, 'w', encoding='utf-8') as f:
+                    for row, h in enumerate(keep):
+                        f.write(json.dumps({'h': h, 'r': row, 't': self.written_at.get(h, 0)}) + "\n")
+                os.replace(tmp_vectors, self.vectors_path)
+                os.replace(tmp_index, self.index_path)
+                tmp_generation = self.generation_path + ".tmp"
+                with open(tmp_generation, 'w', encoding='utf-8') as f:
+                    f.write(str(self._generation + 1))
+                os.replace(tmp_generation, self.generation_path)
+                self._refresh()
+                return len(keep)
+            finally:
+                lock.close()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'rows': len(self.rows),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+        }
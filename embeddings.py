@@ -0,0 +1,213 @@
+"""One sentence-transformer per process, shared by the dashboard and batch jobs.
+
+EMBEDDING_MODEL   model id, or "mpnet" (default) / "small" (all-MiniLM-L6-v2)
+EMBEDDING_BACKEND torch (default), onnx, or onnx-int8 for a dynamically quantized ONNX model
+EMBED_ONNX_FILE   quantized file for onnx-int8, onnx/model_<weights dtype>_<config>.onnx as
+                  export_dynamic_quantized_onnx_model names it; taken from the model repo
+                  when it ships one, else quantized locally with that config
+EMBED_BATCH_SIZE  texts per encode call
+EMBED_THREADS     torch intra-op threads, 0 leaves torch's default
+EMBED_CACHE       1 to look vectors up in the embedding_cache before encoding
+"""
+from dotenv import load_dotenv
+import os
+import threading
+import time
+load_dotenv()
+
+MODEL_ALIASES = {
+    "mpnet": "sentence-transformers/all-mpnet-base-v2",
+    "small": "sentence-transformers/all-MiniLM-L6-v2",
+}
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "mpnet")
+EMBEDDING_MODEL = MODEL_ALIASES.get(EMBEDDING_MODEL, EMBEDDING_MODEL)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# optimum's avx2 config quantizes weights to QUInt8, hence quint8
+EMBED_ONNX_FILE = os.getenv("EMBED_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+EMBED_QUANTIZED_DIR = os.getenv("EMBED_QUANTIZED_DIR", os.path.join(".cache", "onnx"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))
+EMBED_CACHE = os.getenv("EMBED_CACHE", "1") == "1"
+
+_model = None
+_model_lock = threading.Lock()
+_metrics = {'model': EMBEDDING_MODEL, 'backend': EMBEDDING_BACKEND, 'load_seconds': None,
+            'documents': 0, 'encode_seconds': 0.0}
+_metrics_lock = threading.Lock()
+
+
+def model_key(model_name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND):
+    """Identifies the vector space; caches and indexes built by different models must not mix"""
+    key = model_name if backend == "torch" else f"{model_name}@{backend}"
+    return key.replace("/", "__")
+
+
+def load_sentence_model(model_name=EMBEDDING_MODEL, backend=EMBEDDING_BACKEND):
+    """A new SentenceTransformer for model_name on the CPU with the given backend"""
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        import torch
+
+        if EMBED_THREADS:
+            torch.set_num_threads(EMBED_THREADS)
+        return SentenceTransformer(model_name, device="cpu")
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device="cpu", backend="onnx")
+    if backend == "onnx-int8":
+        # sentence-transformers silently exports an fp32 model when file_name is missing,
+        # so make sure the quantized file exists before loading it
+        return SentenceTransformer(quantized_onnx_dir(model_name), device="cpu", backend="onnx",
+                                   model_kwargs={"file_name": EMBED_ONNX_FILE})
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+
+def quantized_onnx_dir(model_name, onnx_file=EMBED_ONNX_FILE):
+    """model_name if its repo (or directory) has onnx_file, else a local directory quantized once to onnx_file"""
+    from huggingface_hub import hf_hub_download
+    from huggingface_hub.errors import EntryNotFoundError
+
+    if os.path.isdir(model_name):
+        if os.path.exists(os.path.join(model_name, onnx_file)):
+            return model_name
+    else:
+        try:
+            hf_hub_download(model_name, onnx_file)
+            return model_name
+        except EntryNotFoundError as e:
+            print(f"---No {onnx_file} for {model_name} ({type(e).__name__}); using a local quantization---")
+
+    local_dir = os.path.join(EMBED_QUANTIZED_DIR, model_key(model_name, "onnx-int8"))
+    if not os.path.exists(os.path.join(local_dir, onnx_file)):
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+        # "onnx/model_quint8_avx2.onnx" -> suffix "quint8_avx2", config "avx2"
+        suffix = os.path.splitext(os.path.basename(onnx_file))[0].removeprefix("model_")
+        config = suffix.split("_", 1)[1]
+        print(f"---Quantizing {model_name} with the {config} config---")
+        model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+        model.save_pretrained(local_dir)
+        export_dynamic_quantized_onnx_model(model, config, local_dir, file_suffix=suffix)
+    return local_dir
+
+
+def get_sentence_model():
+    """The shared model, loaded on first call"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                start = time.perf_counter()
+                _model = load_sentence_model()
+                _metrics['load_seconds'] = time.perf_counter() - start
+                print(f"---Loaded embedding model {EMBEDDING_MODEL} ({EMBEDDING_BACKEND}) "
+                      f"in {_metrics['load_seconds']:.1f}s---")
+    return _model
+
+
+def _encode(texts, batch_size):
+    """Run the model over texts, longest first so each batch pads to similar lengths"""
+    import numpy as np
+
+    model = get_sentence_model()
+    vectors = np.zeros((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+
+    start = time.perf_counter()
+    for offset in range(0, len(order), batch_size):
+        batch = order[offset:offset + batch_size]
+        vectors[batch] = model.encode([texts[i] for i in batch], batch_size=len(batch),
+                                      convert_to_numpy=True, normalize_embeddings=True)
+    elapsed = time.perf_counter() - start
+
+    with _metrics_lock:
+        _metrics['documents'] += len(texts)
+        _metrics['encode_seconds'] += elapsed
+    return vectors
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """The on-disk vector cache for EMBEDDING_MODEL"""
+    global _cache
+    if _cache is None:
+        # Load the model first: get_sentence_model() takes _model_lock itself
+        dim = get_sentence_model().get_sentence_embedding_dimension()
+        with _cache_lock:
+            if _cache is None:
+                from embedding_cache import EmbeddingCache
+
+                _cache = EmbeddingCache(model_key(), dim)
+    return _cache
+
+
+def compact_embedding_cache(keep_texts=()):
+    """Drop cached vectors older than EMBED_CACHE_MAX_AGE_DAYS unless their text is in keep_texts"""
+    if not EMBED_CACHE:
+        return None
+    from embedding_cache import EMBED_CACHE_MAX_AGE_DAYS, text_hash
+
+    cache = get_embedding_cache()
+    before = len(cache.rows)
+    kept = cache.compact(keep_hashes={text_hash(text) for text in keep_texts}, max_age_days=EMBED_CACHE_MAX_AGE_DAYS)
+    print(f"---Compacted embedding cache from {before} to {kept} vectors---")
+    return kept
+
+
+def embed_texts(texts, batch_size=EMBED_BATCH_SIZE, use_cache=EMBED_CACHE):
+    """Normalized float32 embeddings, one row per text, in input order"""
+    texts = list(texts)
+    if not use_cache or not texts:
+        return _encode(texts, batch_size)
+
+    from embedding_cache import text_hash
+
+    cache = get_embedding_cache()
+    hashes = [text_hash(text) for text in texts]
+    vectors, found = cache.get_many(hashes)
+    missing = [i for i in range(len(texts)) if not found[i]]
+    if missing:
+        encoded = _encode([texts[i] for i in missing], batch_size)
+        vectors[missing] = encoded
+        cache.put_many([hashes[i] for i in missing], encoded)
+    return vectors
+
+
+def embedding_metrics():
+    """Model load time and cumulative encode throughput for this process"""
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    seconds = metrics['encode_seconds']
+    metrics['docs_per_sec'] = metrics['documents'] / seconds if seconds else None
+    metrics['cache'] = _cache.stats() if _cache is not None else None
+    return metrics
+
+
+def warm_up():
+    """Load the model and run one encode so the first real request is not the slow one"""
+    embed_texts(["warm up"], use_cache=False)
+
+
+_langchain_embeddings = None
+
+
+def get_embeddings():
+    """LangChain Embeddings backed by the shared model, for vector stores"""
+    global _langchain_embeddings
+    if _langchain_embeddings is None:
+        from langchain_core.embeddings import Embeddings
+
+        class SharedEmbeddings(Embeddings):
+            def embed_documents(self, texts):
+                return embed_texts(texts).tolist()
+
+            def embed_query(self, text):
+                return embed_texts([text])[0].tolist()
+
+        _langchain_embeddings = SharedEmbeddings()
+    return _langchain_embeddings
@@ -0,0 +1,51 @@
+"""Deterministic synthetic jobs and resumes for the stub scraper and the benchmarks."""
+import random
+
+TITLES = ["Data Engineer", "Python Developer", "Backend Engineer", "ML Engineer", "Frontend Developer",
+          "DevOps Engineer", "Data Scientist", "Java Developer", "QA Engineer", "Cloud Architect"]
+SKILLS = ["Python", "SQL", "Spark", "Airflow", "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Kafka",
+          "React", "TypeScript", "Java", "Spring", "Django", "FastAPI", "PyTorch", "TensorFlow", "Pandas",
+          "Terraform", "Jenkins", "Selenium", "Go", "Scala", "PostgreSQL", "MongoDB", "Redis"]
+CITIES = ["Bangalore", "Mumbai", "Pune", "Hyderabad", "Chennai", "Delhi", "Remote"]
+DUTIES = ["design and build {s} services", "own {s} pipelines end to end", "migrate legacy systems to {s}",
+          "mentor engineers on {s}", "tune {s} for cost and latency", "automate testing with {s}"]
+
+
+def synthetic_jobs(n, seed=0):
+    """List of scraped-job dicts shaped like JobScraper output"""
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(n):
+        title = rng.choice(TITLES)
+        skills = rng.sample(SKILLS, 5)
+        low = rng.randint(0, 8)
+        duties = " ".join(rng.choice(DUTIES).format(s=s) + "." for s in skills)
+        jobs.append({
+            'title': f"{rng.choice(['', 'Senior ', 'Lead ', 'Junior '])}{title}",
+            'company': f"Company {rng.randint(1, max(2, n // 20))}",
+            'location': rng.choice(CITIES),
+            'experience': f"{low}-{low + rng.randint(2, 5)} years",
+            'salary': f"₹{low + 4}-{low + 10} LPA",
+            'posted_date': f"{rng.randint(1, 30)} days ago",
+            'job_link': f"https://jobs.example/{i}",
+            'source': rng.choice(['LinkedIn', 'Naukri']),
+            'skills': skills,
+            'skills_text': ", ".join(skills),
+            'description': f"We are hiring a {title} to {duties} "
+                           f"You have {low}+ years of experience with {', '.join(skills[:3])}.",
+        })
+    return jobs
+
+
+def synthetic_resumes(n, seed=1):
+    """Resume texts in the shape resume_query_text produces"""
+    rng = random.Random(seed)
+    resumes = []
+    for i in range(n):
+        skills = rng.sample(SKILLS, 6)
+        resumes.append(
+            f"{{'Name': 'Candidate {i}', 'Years of experience': {rng.randint(1, 12)}, "
+            f"'Skills': {skills}, 'Experience': '{rng.choice(TITLES)} at Company {rng.randint(1, 50)}, "
+            f"{rng.choice(DUTIES).format(s=skills[0])}', 'Certifications': []}}"
+        )
+    return resumes
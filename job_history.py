@@ -0,0 +1,285 @@
+"""Accumulated scrape results with SQL analytics on DuckDB.
+
+Every fresh scrape is appended as a Parquet part under JOB_HISTORY_DIR/parts.
+The parts are the raw log: one row per posting seen by a scrape. Daily
+rollups are kept in JOB_HISTORY_DIR/rollups.duckdb and refreshed
+incrementally. Only parts that have not been ingested yet are aggregated, and
+a posting counts once per day however many searches return it. Dashboard
+panels read the rollups, so their cost depends on days x companies rather
+than on the number of rows.
+
+Writers hold an exclusive file lock and readers a shared one, so the
+dashboard and the API service can use the same directory.
+
+JOB_HISTORY      1 (default) to record scrapes when duckdb is installed
+JOB_HISTORY_DIR  directory for parts and rollups (default .cache/history)
+"""
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+import fcntl
+import glob
+import importlib.util
+import os
+import re
+import threading
+import uuid
+
+JOB_HISTORY = os.getenv("JOB_HISTORY", "1") == "1"
+JOB_HISTORY_DIR = os.getenv("JOB_HISTORY_DIR", os.path.join(".cache", "history"))
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested (part VARCHAR PRIMARY KEY, ingested_at TIMESTAMP);
+CREATE TABLE IF NOT EXISTS sightings (job_id VARCHAR, day DATE, PRIMARY KEY (job_id, day));
+CREATE TABLE IF NOT EXISTS daily_jobs (
+    day DATE, company VARCHAR, location VARCHAR, source VARCHAR, jobs BIGINT,
+    exp_n BIGINT, exp_min_sum DOUBLE, exp_max_sum DOUBLE, exp_low DOUBLE, exp_high DOUBLE,
+    salary_n BIGINT, salary_min_sum DOUBLE, salary_max_sum DOUBLE, salary_low DOUBLE, salary_high DOUBLE,
+    PRIMARY KEY (day, company, location, source));
+CREATE TABLE IF NOT EXISTS daily_skills (day DATE, skill VARCHAR, jobs BIGINT, PRIMARY KEY (day, skill));
+"""
+
+_NUMBER = re.compile(r"\d+(?:,\d+)*(?:\.\d+)?")
+
+
+def history_available():
+    """True when recording is enabled and duckdb can be imported"""
+    return JOB_HISTORY and importlib.util.find_spec("duckdb") is not None
+
+
+def parse_experience(text):
+    """(min, max) years from "2-5 Yrs", "3+ years" or "5 years"; max is None for open ranges"""
+    numbers = [float(n) for n in _NUMBER.findall(str(text or "").replace(",", ""))]
+    if not numbers:
+        return None, None
+    if len(numbers) >= 2:
+        return min(numbers[:2]), max(numbers[:2])
+    return numbers[0], None if "+" in str(text) else numbers[0]
+
+
+def parse_salary(text):
+    """(min, max) in lakhs per annum from strings like "3-6 Lacs PA", "₹12,00,000 - 18,00,000 P.A." or "10 LPA"
+
+    Returns (None, None) for "Not disclosed" and anything without a number.
+    """
+    text = str(text or "").lower()
+    numbers = [float(n.replace(",", "")) for n in _NUMBER.findall(text)]
+    if not numbers:
+        return None, None
+    low, high = min(numbers[:2]), max(numbers[:2])
+    if re.search(r"\bcr", text):
+        scale = 100.0
+    elif re.search(r"lac|lakh|lpa|\bl\b", text):
+        scale = 1.0
+    elif high >= 1000:
+        scale = 1e-5  # plain rupees
+    else:
+        scale = 1.0
+    if re.search(r"month|/mo|\bpm\b", text):
+        scale *= 12
+    return round(low * scale, 2), round(high * scale, 2)
+
+
+def history_frame(df, scraped_at):
+    """Scraped jobs as rows of the Parquet log: ids, normalized skills and parsed ranges"""
+    import pandas as pd
+
+    from job_parser import job_id
+    from skill_index import job_skills
+
+    jobs = df.to_dict('records')
+    when = datetime.fromtimestamp(scraped_at)
+    experience = [parse_experience(job.get('experience')) for job in jobs]
+    salary = [parse_salary(job.get('salary')) for job in jobs]
+
+    def column(name):
+        return [str(job.get(name, 'N/A')) for job in jobs]
+
+    return pd.DataFrame({
+        'job_id': [job_id(job) for job in jobs],
+        'scraped_at': pd.Series([when] * len(jobs), dtype='datetime64[us]'),
+        'day': pd.Series([when.date()] * len(jobs), dtype='datetime64[s]'),
+        'title': column('title'),
+        'company': column('company'),
+        'location': column('location'),
+        'source': column('source'),
+        'experience': column('experience'),
+        'salary': column('salary'),
+        'posted_date': column('posted_date'),
+        'job_link': column('job_link'),
+        'skills': [sorted(job_skills(job)) for job in jobs],
+        'exp_min': pd.Series([e[0] for e in experience], dtype='float64'),
+        'exp_max': pd.Series([e[1] for e in experience], dtype='float64'),
+        'salary_min': pd.Series([s[0] for s in salary], dtype='float64'),
+        'salary_max': pd.Series([s[1] for s in salary], dtype='float64'),
+    })
+
+
+class JobHistory:
+    def __init__(self, directory=JOB_HISTORY_DIR):
+        self.directory = directory
+        self.parts_dir = os.path.join(directory, "parts")
+        self.db_path = os.path.join(directory, "rollups.duckdb")
+        self.lock_path = os.path.join(directory, "lock")
+        self._lock = threading.Lock()
+        os.makedirs(self.parts_dir, exist_ok=True)
+        with self._connect(exclusive=True) as con:
+            con.execute(ROLLUP_SCHEMA)
+
+    def _file_lock(self, exclusive):
+        f = open(self.lock_path, 'a')
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return f
+
+    @contextmanager
+    def _connect(self, exclusive=False):
+        """A DuckDB connection held together with the matching file lock"""
+        import duckdb
+
+        with self._lock if exclusive else nullcontext():
+            lock = self._file_lock(exclusive)
+            try:
+                con = duckdb.connect(self.db_path, read_only=not exclusive)
+                try:
+                    yield con
+                finally:
+                    con.close()
+            finally:
+                lock.close()
+
+    def _parts(self):
+        return sorted(os.path.relpath(p, self.parts_dir)
+                      for p in glob.glob(os.path.join(self.parts_dir, "*", "*.parquet")))
+
+    def append(self, df, scraped_at):
+        """Log one scrape (a JobScraper DataFrame) and fold it into the rollups; returns rows written"""
+        if df is None or df.empty:
+            return 0
+        batch = history_frame(df, scraped_at)
+        day = datetime.fromtimestamp(scraped_at).strftime("%Y-%m-%d")
+        name = f"{int(scraped_at * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+        os.makedirs(os.path.join(self.parts_dir, day), exist_ok=True)
+        path = os.path.join(self.parts_dir, day, name)
+
+        with self._connect(exclusive=True) as con:
+            con.register("batch", batch)
+            # Write under a temporary name so readers globbing the parts never see a partial file
+            con.execute(f"COPY (SELECT * REPLACE (day::DATE AS day) FROM batch) TO '{path}.tmp' (FORMAT PARQUET)")
+            con.unregister("batch")
+            os.replace(f"{path}.tmp", path)
+            self._ingest(con)
+        return len(batch)
+
+    def refresh(self):
+        """Fold any parts not yet in the rollups (e.g. left by a crash or copied in); returns how many"""
+        with self._connect(exclusive=True) as con:
+            return self._ingest(con)
+
+    def _ingest(self, con):
+        done = {row[0] for row in con.execute("SELECT part FROM ingested").fetchall()}
+        pending = [part for part in self._parts() if part not in done]
+        if not pending:
+            return 0
+        files = [os.path.join(self.parts_dir, part) for part in pending]
+
+        con.execute("BEGIN TRANSACTION")
+        try:
+            # New postings per day: first sighting only, and only if no earlier part had it that day
+            con.execute("""
+                CREATE OR REPLACE TEMP TABLE new_rows AS
+                SELECT * FROM read_parquet(?) p
+                WHERE NOT EXISTS (SELECT 1 FROM sightings s WHERE s.job_id = p.job_id AND s.day = p.day)
+                QUALIFY row_number() OVER (PARTITION BY job_id, day ORDER BY scraped_at) = 1
+            """, [files])
+            con.execute("INSERT INTO sightings SELECT job_id, day FROM new_rows")
+            con.execute("""
+                INSERT INTO daily_jobs
+                SELECT day, company, location, source, count(*),
+                       count(exp_min), sum(exp_min), sum(coalesce(exp_max, exp_min)), min(exp_min), max(exp_max),
+                       count(salary_min), sum(salary_min), sum(salary_max), min(salary_min), max(salary_max)
+                FROM new_rows GROUP BY ALL
+                ON CONFLICT (day, company, location, source) DO UPDATE SET
+                    jobs = jobs + excluded.jobs,
+                    exp_n = exp_n + excluded.exp_n,
+                    exp_min_sum = coalesce(exp_min_sum, 0) + coalesce(excluded.exp_min_sum, 0),
+                    exp_max_sum = coalesce(exp_max_sum, 0) + coalesce(excluded.exp_max_sum, 0),
+                    exp_low = least(exp_low, excluded.exp_low),
+                    exp_high = greatest(exp_high, excluded.exp_high),
+                    salary_n = salary_n + excluded.salary_n,
+                    salary_min_sum = coalesce(salary_min_sum, 0) + coalesce(excluded.salary_min_sum, 0),
+                    salary_max_sum = coalesce(salary_max_sum, 0) + coalesce(excluded.salary_max_sum, 0),
+                    salary_low = least(salary_low, excluded.salary_low),
+                    salary_high = greatest(salary_high, excluded.salary_high)
+            """)
+            con.execute("""
+                INSERT INTO daily_skills
+                SELECT day, skill, count(*) FROM (SELECT day, unnest(skills) AS skill FROM new_rows) GROUP BY ALL
+                ON CONFLICT (day, skill) DO UPDATE SET jobs = jobs + excluded.jobs
+            """)
+            con.executemany("INSERT INTO ingested VALUES (?, now())", [[part] for part in pending])
+            con.execute("DROP TABLE new_rows")
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return len(pending)
+
+    def query(self, sql, params=None):
+        """Run read-only SQL; `jobs` is a view over every logged row, next to the rollup tables"""
+        with self._connect() as con:
+            parts = os.path.join(self.parts_dir, "*", "*.parquet")
+            if glob.glob(parts):
+                con.execute(f"CREATE TEMP VIEW jobs AS SELECT * FROM read_parquet('{parts}')")
+            return con.execute(sql, params or []).df()
+
+    def jobs_per_day(self, days=30):
+        return self.query("""
+            SELECT day, source, sum(jobs) AS jobs FROM daily_jobs
+            WHERE day >= current_date - ?::INTEGER GROUP BY ALL ORDER BY day, source
+        """, [days])
+
+    def top_skills(self, days=30, limit=15):
+        return self.query("""
+            SELECT skill, sum(jobs) AS jobs FROM daily_skills
+            WHERE day >= current_date - ?::INTEGER GROUP BY skill ORDER BY jobs DESC, skill LIMIT ?
+        """, [days, limit])
+
+    def top(self, column, days=30, limit=10):
+        """Job counts per company, location or source over the window"""
+        if column not in ("company", "location", "source"):
+            raise ValueError(f"Cannot group by {column!r}")
+        return self.query(f"""
+            SELECT {column}, sum(jobs) AS jobs FROM daily_jobs
+            WHERE day >= current_date - ?::INTEGER AND {column} != 'N/A'
+            GROUP BY ALL ORDER BY jobs DESC, {column} LIMIT ?
+        """, [days, limit])
+
+    def ranges(self, column="location", days=30, limit=10):
+        """Average and overall salary (LPA) and experience (years) ranges per company or location"""
+        if column not in ("company", "location", "source"):
+            raise ValueError(f"Cannot group by {column!r}")
+        return self.query(f"""
+            SELECT {column}, sum(jobs) AS jobs,
+                   sum(salary_min_sum) / nullif(sum(salary_n), 0) AS salary_min_avg,
+                   sum(salary_max_sum) / nullif(sum(salary_n), 0) AS salary_max_avg,
+                   min(salary_low) AS salary_low, max(salary_high) AS salary_high,
+                   sum(exp_min_sum) / nullif(sum(exp_n), 0) AS exp_min_avg,
+                   sum(exp_max_sum) / nullif(sum(exp_n), 0) AS exp_max_avg,
+                   min(exp_low) AS exp_low, max(exp_high) AS exp_high
+            FROM daily_jobs
+            WHERE day >= current_date - ?::INTEGER AND {column} != 'N/A'
+            GROUP BY ALL ORDER BY jobs DESC, {column} LIMIT ?
+        """, [days, limit])
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_job_history():
+    """The shared JobHistory for JOB_HISTORY_DIR"""
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = JobHistory()
+    return _history
@@ -0,0 +1,555 @@
+"""Persistent FAISS index of enriched jobs, keyed by job_parser.job_id.
+
+Jobs are embedded once when first added; later runs only pay for postings
+the index has not seen. Each save writes a new snapshot directory and then
+swaps the CURRENT pointer file, so readers never see a half-written index.
+The process-wide index lives in a subdirectory per embedding model.
+
+Job metadata is kept out of the vector index, in a SQLite table keyed by
+FAISS id. Several processes (the dashboard and the API) can share one
+directory: add, remove and rebuild run under an exclusive file lock, first
+reload the latest snapshot if another process saved one, and save before
+releasing the lock. Searches pick up newer snapshots as well.
+
+JOB_INDEX_TYPE picks the FAISS structure:
+
+flat   exact inner-product search (default)
+hnsw   graph index; JOB_INDEX_HNSW_M, JOB_INDEX_EF_CONSTRUCTION, JOB_INDEX_EF_SEARCH
+ivfpq  inverted lists with product quantization, trained on a sample, whose
+       JOB_INDEX_REFINE_K_FACTOR * k candidates are re-scored exactly against
+       the full vectors; JOB_INDEX_NLIST, JOB_INDEX_PQ_M, JOB_INDEX_PQ_NBITS,
+       JOB_INDEX_NPROBE
+
+Until JOB_INDEX_TRAIN_MIN jobs exist an ivfpq index stays flat, since there
+is too little data to train it.
+
+A skill_index.SkillIndex is kept in the same SQLite file; search_shortlist
+uses it to pick candidates by skill overlap and BM25 and scores only those
+densely, with the vectors read back from the FAISS index.
+"""
+from embeddings import compact_embedding_cache, embed_texts, model_key
+from skill_index import SkillIndex, normalize_skill
+import fcntl
+import json
+import math
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+JOB_INDEX_DIR = os.getenv("JOB_INDEX_DIR", os.path.join(".cache", "job_index"))
+JOB_INDEX_MAX_AGE_DAYS = float(os.getenv("JOB_INDEX_MAX_AGE_DAYS", "30"))
+JOB_INDEX_TYPE = os.getenv("JOB_INDEX_TYPE", "flat")
+JOB_INDEX_HNSW_M = int(os.getenv("JOB_INDEX_HNSW_M", "32"))
+JOB_INDEX_EF_CONSTRUCTION = int(os.getenv("JOB_INDEX_EF_CONSTRUCTION", "200"))
+JOB_INDEX_EF_SEARCH = int(os.getenv("JOB_INDEX_EF_SEARCH", "64"))
+JOB_INDEX_NLIST = int(os.getenv("JOB_INDEX_NLIST", "1024"))
+# 96 sub-quantizers of 8 dimensions each for 768-d embeddings (mpnet)
+JOB_INDEX_PQ_M = int(os.getenv("JOB_INDEX_PQ_M", "96"))
+JOB_INDEX_PQ_NBITS = int(os.getenv("JOB_INDEX_PQ_NBITS", "8"))
+JOB_INDEX_NPROBE = int(os.getenv("JOB_INDEX_NPROBE", "16"))
+JOB_INDEX_REFINE_K_FACTOR = float(os.getenv("JOB_INDEX_REFINE_K_FACTOR", "32"))
+JOB_INDEX_TRAIN_MIN = int(os.getenv("JOB_INDEX_TRAIN_MIN", "10000"))
+JOB_INDEX_TRAIN_SAMPLE = int(os.getenv("JOB_INDEX_TRAIN_SAMPLE", "50000"))
+SKILL_SHORTLIST_SIZE = int(os.getenv("SKILL_SHORTLIST_SIZE", "200"))
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+KEEP_SNAPSHOTS = 2
+# Rebuild once this share of the vectors belongs to removed jobs (HNSW and refined IVF-PQ
+# indexes cannot delete in place)
+MAX_TOMBSTONE_RATIO = 0.2
+# Searches over an index holding removed jobs start at this many times k results and grow by
+# the same factor while removed jobs crowd out live ones
+SEARCH_OVERSAMPLE = 2
+REBUILD_CHUNK = 50000
+
+
+def faiss_id(jid):
+    """int64 FAISS id for a hex job id"""
+    return int(jid, 16) & 0x7FFFFFFFFFFFFFFF
+
+
+def job_text(job):
+    """Text that gets embedded for a job"""
+    return "\n".join(f"{k}: {v}" for k, v in job.items() if k != 'job_id')
+
+
+def relevance(cosine):
+    """Cosine similarity mapped to LangChain's FAISS relevance score, so thresholds carry over"""
+    return 1.0 - (2.0 - 2.0 * cosine) / math.sqrt(2)
+
+
+def make_faiss_index(index_type, dim, n_vectors=0):
+    """Empty FAISS index of the given type; ivfpq still needs train()
+
+    ivfpq scores are PQ approximations, too coarse for relevance() and its threshold, so the
+    IVF-PQ index only proposes candidates and IndexRefineFlat re-scores them exactly.
+    """
+    import faiss
+
+    if index_type == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+    if index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, JOB_INDEX_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = JOB_INDEX_EF_CONSTRUCTION
+        return faiss.IndexIDMap2(hnsw)
+    if index_type == "ivfpq":
+        # ~4 * sqrt(n) lists, and enough training points per list for k-means
+        nlist = max(1, min(JOB_INDEX_NLIST, int(4 * math.sqrt(max(n_vectors, 1))), n_vectors // 39 or 1))
+        pq_m = JOB_INDEX_PQ_M
+        while dim % pq_m:
+            pq_m -= 1
+        quantizer = faiss.IndexFlatIP(dim)
+        ivfpq = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, JOB_INDEX_PQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+        refine = faiss.IndexRefineFlat(ivfpq)
+        refine.k_factor = JOB_INDEX_REFINE_K_FACTOR
+        return faiss.IndexIDMap2(refine)
+    raise ValueError(f"Unknown JOB_INDEX_TYPE {index_type!r}; expected one of {', '.join(INDEX_TYPES)}")
+
+
+def _inner_index(index):
+    """The index doing the search: unwraps IndexIDMap2 and, for ivfpq, IndexRefine"""
+    import faiss
+
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(inner, faiss.IndexRefine):
+        inner = faiss.downcast_index(inner.base_index)
+    return inner
+
+
+def removes_in_place(index):
+    """Whether remove_ids works; other indexes keep removed vectors as tombstones until a rebuild"""
+    import faiss
+
+    wrapped = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    return not isinstance(wrapped, (faiss.IndexHNSW, faiss.IndexRefine))
+
+
+def index_type_of(index):
+    import faiss
+
+    inner = _inner_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivfpq"
+    return "flat"
+
+
+def set_search_params(index, ef_search=JOB_INDEX_EF_SEARCH, nprobe=JOB_INDEX_NPROBE):
+    import faiss
+
+    inner = _inner_index(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = ef_search
+    elif isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = nprobe
+        if inner is index and inner.direct_map.type == faiss.DirectMap.NoMap:
+            # Unrefined ivfpq indexes saved before search_shortlist reconstructed vectors
+            inner.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+
+class JobStore:
+    """Job dicts by FAISS id in SQLite, so the vector index holds nothing but vectors"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level="DEFERRED")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS jobs ("
+                          "id INTEGER PRIMARY KEY, job_id TEXT NOT NULL, added_at REAL NOT NULL, doc TEXT NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_added_at ON jobs (added_at)")
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def existing(self, ids):
+        found = set()
+        ids = list(ids)
+        for offset in range(0, len(ids), 500):
+            chunk = ids[offset:offset + 500]
+            rows = self.conn.execute(f"SELECT id FROM jobs WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            found.update(row[0] for row in rows)
+        return found
+
+    def get_many(self, ids):
+        docs = {}
+        ids = list(ids)
+        for offset in range(0, len(ids), 500):
+            chunk = ids[offset:offset + 500]
+            rows = self.conn.execute(f"SELECT id, doc FROM jobs WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            docs.update((row[0], json.loads(row[1])) for row in rows)
+        return docs
+
+    def put_many(self, jobs, added_at):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO jobs (id, job_id, added_at, doc) VALUES (?, ?, ?, ?)",
+            [(faiss_id(job['job_id']), job['job_id'], added_at, json.dumps(job, ensure_ascii=False)) for job in jobs],
+        )
+
+    def delete_many(self, ids):
+        self.conn.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in ids])
+
+    def job_ids_older_than(self, cutoff):
+        return [row[0] for row in self.conn.execute("SELECT job_id FROM jobs WHERE added_at < ?", (cutoff,))]
+
+    def iter_chunks(self, size=REBUILD_CHUNK):
+        cursor = self.conn.execute("SELECT id, doc FROM jobs ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            yield [(row[0], json.loads(row[1])) for row in rows]
+
+    def sample(self, n):
+        rows = self.conn.execute("SELECT doc FROM jobs ORDER BY RANDOM() LIMIT ?", (n,))
+        return [json.loads(row[0]) for row in rows]
+
+    def commit(self):
+        self.conn.commit()
+
+
+class JobIndex:
+    def __init__(self, directory=JOB_INDEX_DIR, index_type=JOB_INDEX_TYPE):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown JOB_INDEX_TYPE {index_type!r}; expected one of {', '.join(INDEX_TYPES)}")
+        self.directory = directory
+        self.index_type = index_type
+        self.index = None
+        self.snapshot = None
+        self.tombstones = 0
+        os.makedirs(directory, exist_ok=True)
+        self.store = JobStore(os.path.join(directory, "jobs.sqlite"))
+        self.skills = SkillIndex(self.store.conn)
+        self.pointer_path = os.path.join(directory, "CURRENT")
+        self.lock_path = os.path.join(directory, "lock")
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, directory=JOB_INDEX_DIR, index_type=JOB_INDEX_TYPE):
+        """Latest saved snapshot in directory, or an empty index"""
+        self = cls(directory, index_type)
+        with self._lock:
+            self._sync()
+        return self
+
+    def _file_lock(self, exclusive):
+        f = open(self.lock_path, 'a')
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return f
+
+    def _current_snapshot(self):
+        if not os.path.exists(self.pointer_path):
+            return None
+        with open(self.pointer_path, encoding='utf-8') as f:
+            return f.read().strip() or None
+
+    def _sync(self, locked=False):
+        """Reload the latest snapshot if another process (or index object) saved a newer one.
+
+        locked says the caller already holds the exclusive file lock; otherwise a shared one
+        keeps the snapshot from being pruned while it is read.
+        """
+        if self._current_snapshot() == self.snapshot:
+            return
+        lock = None if locked else self._file_lock(exclusive=False)
+        try:
+            name = self._current_snapshot()
+            if name is not None and name != self.snapshot:
+                self._load_snapshot(name)
+        finally:
+            if lock is not None:
+                lock.close()
+
+    def _load_snapshot(self, name):
+        import faiss
+
+        snapshot = os.path.join(self.directory, name)
+        self.index = faiss.read_index(os.path.join(snapshot, "index.faiss"))
+        set_search_params(self.index)
+        self.tombstones = 0
+        meta_path = os.path.join(snapshot, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                self.tombstones = json.load(f).get('tombstones', 0)
+        legacy_path = os.path.join(snapshot, "jobs.json")
+        if os.path.exists(legacy_path) and not len(self.store):
+            # Snapshots written before metadata moved out of line
+            with open(legacy_path, encoding='utf-8') as f:
+                state = json.load(f)
+            for jid, job in state['jobs'].items():
+                self.store.put_many([dict(job, job_id=jid)], state['added_at'][jid])
+            self.store.commit()
+        if len(self.skills) < len(self.store):
+            # Jobs stored before the skill postings moved into SQLite
+            for chunk in self.store.iter_chunks():
+                missing = set(self.skills.missing(fid for fid, _ in chunk))
+                self.skills.add_many((fid, job) for fid, job in chunk if fid in missing)
+            self.store.commit()
+        self.snapshot = name
+
+    def __len__(self):
+        return len(self.store)
+
+    def __contains__(self, jid):
+        return bool(self.store.existing([faiss_id(jid)]))
+
+    def _target_type(self, n_jobs):
+        if self.index_type == "ivfpq" and n_jobs < JOB_INDEX_TRAIN_MIN:
+            return "flat"
+        return self.index_type
+
+    def add(self, jobs):
+        """Embed, add and save jobs whose job_id is not indexed yet; returns how many were added"""
+        import numpy as np
+
+        new_jobs = {}
+        for job in jobs:
+            new_jobs.setdefault(faiss_id(job['job_id']), job)
+        with self._lock:
+            for fid in self.store.existing(new_jobs):
+                del new_jobs[fid]
+        if not new_jobs:
+            return 0
+        # Embed before taking any lock so searches and other processes are not held up by the model
+        vectors = dict(zip(new_jobs, embed_texts([job_text(job) for job in new_jobs.values()])))
+
+        with self._lock:
+            lock = self._file_lock(exclusive=True)
+            try:
+                self._sync(locked=True)
+                # Another thread or process may have stored some of these meanwhile
+                for fid in self.store.existing(new_jobs):
+                    del new_jobs[fid]
+                if not new_jobs:
+                    return 0
+                matrix = np.stack([vectors[fid] for fid in new_jobs])
+                if self.index is None:
+                    self.index = make_faiss_index(self._target_type(len(new_jobs)), matrix.shape[1], len(new_jobs))
+                    set_search_params(self.index)
+                if self.index.is_trained:
+                    self.index.add_with_ids(matrix, np.array(list(new_jobs), dtype=np.int64))
+                self.store.put_many(new_jobs.values(), time.time())
+                self.skills.add_many(new_jobs.items())
+                if not self.index.is_trained or index_type_of(self.index) != self._target_type(len(self.store)):
+                    self._rebuild()
+                self._save()
+            finally:
+                lock.close()
+            return len(new_jobs)
+
+    def remove(self, job_ids):
+        """Drop and save the given job ids; unknown ids are ignored. Returns how many were removed"""
+        import numpy as np
+
+        with self._lock:
+            lock = self._file_lock(exclusive=True)
+            try:
+                self._sync(locked=True)
+                present = list(self.store.existing(faiss_id(jid) for jid in job_ids))
+                if not present:
+                    return 0
+                self.store.delete_many(present)
+                self.skills.remove_many(present)
+                if not removes_in_place(self.index):
+                    # Vectors stay in the index until the next rebuild; search skips them
+                    self.tombstones += len(present)
+                    if self.tombstones > MAX_TOMBSTONE_RATIO * self.index.ntotal:
+                        self._rebuild()
+                else:
+                    self.index.remove_ids(np.array(present, dtype=np.int64))
+                self._save()
+            finally:
+                lock.close()
+            return len(present)
+
+    def expire(self, max_age_days=JOB_INDEX_MAX_AGE_DAYS):
+        """Remove postings indexed more than max_age_days ago, then compact the embedding cache"""
+        cutoff = time.time() - max_age_days * 86400
+        removed = self.remove(self.store.job_ids_older_than(cutoff))
+        if removed:
+            with self._lock:
+                live_texts = [job_text(job) for chunk in self.store.iter_chunks() for _, job in chunk]
+            # Rebuilds re-read the live jobs' vectors, so those stay whatever their age
+            compact_embedding_cache(live_texts)
+        return removed
+
+    def rebuild(self, index_type=None):
+        """Recreate the FAISS index from the stored jobs, training it on a sample if needed, and save it.
+
+        Vectors come from embed_texts, so with the embedding cache on this re-reads
+        cached vectors rather than running the model again.
+        """
+        with self._lock:
+            lock = self._file_lock(exclusive=True)
+            try:
+                self._sync(locked=True)
+                if index_type is not None:
+                    self.index_type = index_type
+                self._rebuild()
+                self._save()
+            finally:
+                lock.close()
+
+    def _rebuild(self):
+        import numpy as np
+
+        n_jobs = len(self.store)
+        target = self._target_type(n_jobs)
+        index = None
+        if target == "ivfpq":
+            sample = embed_texts([job_text(job) for job in self.store.sample(JOB_INDEX_TRAIN_SAMPLE)])
+            index = make_faiss_index(target, sample.shape[1], n_jobs)
+            index.train(sample)
+        for chunk in self.store.iter_chunks():
+            vectors = embed_texts([job_text(job) for _, job in chunk])
+            if index is None:
+                index = make_faiss_index(target, vectors.shape[1], n_jobs)
+            index.add_with_ids(vectors, np.array([fid for fid, _ in chunk], dtype=np.int64))
+        if index is not None:
+            set_search_params(index)
+        self.index = index
+        self.tombstones = 0
+        print(f"---Rebuilt {target} job index over {n_jobs} jobs---")
+
+    def search(self, query_vectors, k=4, score_threshold=None):
+        """For each query row, up to k (job, score) pairs, best first"""
+        import numpy as np
+
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        with self._lock:
+            self._sync()
+            if self.index is None or not self.index.ntotal:
+                return [[] for _ in range(len(query_vectors))]
+            results = [None] * len(query_vectors)
+            pending = list(range(len(query_vectors)))
+            # Removed jobs still in the index take result slots, so ask for some spares and fetch
+            # more only for the rare query whose top results are mostly removed jobs
+            fetch = min(k * SEARCH_OVERSAMPLE if self.tombstones else k, self.index.ntotal)
+            while pending:
+                sims, ids = self.index.search(query_vectors[pending], fetch)
+                docs = self.store.get_many({int(fid) for fid in ids.ravel() if fid != -1})
+                retry = []
+                for row, row_sims, row_ids in zip(pending, sims, ids):
+                    hits, seen = [], set()
+                    for sim, fid in zip(row_sims, row_ids):
+                        fid = int(fid)
+                        # -1 pads short result lists; ids without a doc are removed jobs
+                        if fid == -1 or fid in seen or fid not in docs:
+                            continue
+                        score = relevance(float(sim))
+                        if score_threshold is not None and score < score_threshold:
+                            continue
+                        seen.add(fid)
+                        hits.append((docs[fid], score))
+                        if len(hits) == k:
+                            break
+                    results[row] = hits
+                    # More results can only help if this fetch was full and its last score still passed
+                    exhausted = row_ids[-1] == -1 or (score_threshold is not None
+                                                      and relevance(float(row_sims[-1])) < score_threshold)
+                    if len(hits) < k and not exhausted and fetch < self.index.ntotal:
+                        retry.append(row)
+                pending = retry
+                fetch = min(fetch * SEARCH_OVERSAMPLE, self.index.ntotal)
+            return results
+
+    def search_text(self, text, k=4, score_threshold=None):
+        return self.search(embed_texts([text]), k=k, score_threshold=score_threshold)[0]
+
+    def search_shortlist(self, query_vector, skills, query_text="", k=4, score_threshold=None,
+                         shortlist_size=SKILL_SHORTLIST_SIZE):
+        """Up to k (job, score, matched_skills) triples, scoring only the skill/BM25 shortlist densely.
+
+        Falls back to a full dense search when nothing in the sparse index matches.
+        """
+        import numpy as np
+
+        skills = {normalize_skill(s) for s in skills}
+        with self._lock:
+            self._sync()
+            candidates = self.skills.shortlist(skills, query_text, size=shortlist_size)
+            if not candidates or self.index is None:
+                hits = self.search([query_vector], k=k, score_threshold=score_threshold)[0]
+                matched = self.skills.skills_of(faiss_id(job['job_id']) for job, _ in hits)
+                return [(job, score, skills & matched[faiss_id(job['job_id'])]) for job, score in hits]
+            candidates, vectors = self._reconstruct(candidates)
+            if not candidates:
+                return []
+            sims = vectors @ np.asarray(query_vector, dtype=np.float32)
+            order = [i for i in np.argsort(-sims)
+                     if score_threshold is None or relevance(float(sims[i])) >= score_threshold][:k]
+            docs = self.store.get_many(candidates[i][0] for i in order)
+        hits = []
+        for i in order:
+            fid, matched = candidates[i]
+            if fid in docs:
+                hits.append((docs[fid], relevance(float(sims[i])), matched))
+        return hits
+
+    def _reconstruct(self, candidates):
+        """(candidates, their vectors as stored in the FAISS index), dropping ids the index lacks.
+
+        An id can be missing when another process committed jobs whose snapshot is not loaded yet.
+        """
+        import numpy as np
+
+        try:
+            return candidates, self.index.reconstruct_batch(np.array([fid for fid, _ in candidates], dtype=np.int64))
+        except RuntimeError:
+            kept, vectors = [], []
+            for fid, matched in candidates:
+                try:
+                    vectors.append(self.index.reconstruct(fid))
+                except RuntimeError:
+                    continue
+                kept.append((fid, matched))
+            return kept, np.array(vectors, dtype=np.float32)
+
+    def save(self):
+        """Write a snapshot of this index and point CURRENT at it; add/remove/rebuild already do this"""
+        with self._lock:
+            lock = self._file_lock(exclusive=True)
+            try:
+                self._save()
+            finally:
+                lock.close()
+
+    def _save(self):
+        """Write a new snapshot, atomically point CURRENT at it, then commit the metadata"""
+        import faiss
+
+        if self.index is None:
+            self.store.commit()
+            return
+        name = f"snapshot-{time.time_ns()}-{os.getpid()}"
+        snapshot = os.path.join(self.directory, name)
+        os.makedirs(snapshot)
+        faiss.write_index(self.index, os.path.join(snapshot, "index.faiss"))
+        with open(os.path.join(snapshot, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump({'index_type': index_type_of(self.index), 'tombstones': self.tombstones}, f)
+
+        tmp_pointer = self.pointer_path + f".{os.getpid()}.tmp"
+        with open(tmp_pointer, 'w', encoding='utf-8') as f:
+            f.write(name)
+        os.replace(tmp_pointer, self.pointer_path)
+        self.store.commit()
+        self.snapshot = name
+        self._prune_snapshots()
+
+    def _prune_snapshots(self):
+        snapshots = sorted(d for d in os.listdir(self.directory) if d.startswith("snapshot-"))
+        for old in snapshots[:-KEEP_SNAPSHOTS]:
+            shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+
+
+_job_index = None
+_job_index_lock = threading.Lock()
+
+
+def get_job_index():
+    """The process-wide index, loaded from disk on first use"""
+    global _job_index
+    with _job_index_lock:
+        if _job_index is None:
+            _job_index = JobIndex.load(os.path.join(JOB_INDEX_DIR, model_key()))
+        return _job_index
@@ -1,26 +1,21 @@
 
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from huggingface_hub import login
-from langchain_core.tools import tool
 from dotenv import load_dotenv
 from datetime import date
-import pandas as pd
+from llm_backends import get_llm
+import contextlib
+import fcntl
+import hashlib
 import json
 import os
+import re
+import shutil
+import time
 load_dotenv()
 hf_token = os.getenv("HF_TOKEN")
 
 today = date.today()
 
 
-llm = HuggingFaceEndpoint(
-    repo_id="deepseek-ai/DeepSeek-R1-Distill-Llama-8B",
-    task="text-generation"
-    
-)
-
-
-model = ChatHuggingFace(llm=llm)
 
 prompt="""
 You are an intelligent Job Posting parser.
@@ -58,23 +53,209 @@ Here's the job post text:
 
 Important Rule: Do not return think part in the output or prefix, sufix or explaination, only return the above stated information in JSON format and nothing else.
 """
-def get_job_list(df):
-    l=[]
-    for i in range(len(df)):
-        prompt_with_data=prompt.replace('##input_job##',str(df.iloc[i]))
-        res=model.invoke(prompt_with_data)
-        res.content.replace('\n','')
-        res_final=res.content.split("```json")
-        res_final=res_final[1].split("```")
-        doc_json=json.loads(res_final[0])
-        l.append(doc_json)
-    return l
+CHECKPOINT_DIR = os.getenv("ENRICH_CHECKPOINT_DIR", os.path.join(".cache", "enrichment"))
+MAX_ATTEMPTS = int(os.getenv("ENRICH_MAX_ATTEMPTS", "2"))
+CHECKPOINT_MAX_AGE_DAYS = float(os.getenv("ENRICH_CHECKPOINT_MAX_AGE_DAYS", "7"))
+
+
+def job_id(job):
+    """Stable id for a scraped posting: its link when available, else title/company/location"""
+    link = str(job.get('job_link', '') or '')
+    if link and link not in ('N/A', '#'):
+        key = link
+    else:
+        key = "|".join(str(job.get(field, '')) for field in ('title', 'company', 'location'))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def parse_job_response(content):
+    """Pull the JSON object out of an LLM reply, with or without a ```json fence"""
+    content = re.sub(r'<think>.*?</think>', '', content, flags=re.DOTALL)
+    fenced = re.search(r'```(?:json)?\s*(.*?)```', content, flags=re.DOTALL)
+    if fenced:
+        candidate = fenced.group(1)
+    else:
+        start, end = content.find('{'), content.rfind('}')
+        if start == -1 or end <= start:
+            raise ValueError("No JSON object found in model output")
+        candidate = content[start:end + 1]
+    doc_json = json.loads(candidate)
+    if not isinstance(doc_json, dict):
+        raise ValueError(f"Expected a JSON object, got {type(doc_json).__name__}")
+    return doc_json
+
+
+def run_key(job_ids):
+    """Key of the run enriching a set of postings; its failure list is kept under this name"""
+    return hashlib.sha1("\n".join(sorted(set(job_ids))).encode('utf-8')).hexdigest()[:16]
+
 
+def prune_checkpoints(directory=CHECKPOINT_DIR, max_age_days=CHECKPOINT_MAX_AGE_DAYS):
+    """Delete parse shards, run failure lists and files from older layouts not written for max_age_days"""
+    cutoff = time.time() - max_age_days * 86400
+    for parent in (directory, os.path.join(directory, "parsed"), os.path.join(directory, "runs")):
+        if not os.path.isdir(parent):
+            continue
+        for name in os.listdir(parent):
+            path = os.path.join(parent, name)
+            if parent == directory and name in ("parsed", "runs", "parsed.jsonl"):
+                continue
+            try:
+                files = [os.path.join(path, f) for f in os.listdir(path)] if os.path.isdir(path) else []
+                if max(os.path.getmtime(f) for f in [path, *files]) >= cutoff:
+                    continue
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+            except FileNotFoundError:
+                # Removed by a concurrent prune
+                continue
 
 
+class EnrichmentCheckpoint:
+    """Parsed jobs by job id, plus the failures of one run, so a rerun only pays for what is missing.
 
+    Parses are shared by every run. They are appended to parsed/<first two hex digits of the
+    job id>.jsonl, and only the shards of the requested jobs are read; reading a shard drops
+    records older than CHECKPOINT_MAX_AGE_DAYS and superseded ones. Failures belong to the run
+    (set of job ids) that hit them, in runs/<run_key>/failures.jsonl.
+    """
 
+    def __init__(self, directory=CHECKPOINT_DIR, job_ids=()):
+        job_ids = set(job_ids)
+        self.directory = directory
+        self.parsed_dir = os.path.join(directory, "parsed")
+        self.failures_path = os.path.join(directory, "runs", run_key(job_ids), "failures.jsonl")
+        self.done = {}
+        self.failures = {}
+        os.makedirs(self.parsed_dir, exist_ok=True)
+        self._import_legacy()
+        for prefix in sorted({jid[:2] for jid in job_ids}):
+            for jid, job in self._read_shard(prefix).items():
+                if jid in job_ids:
+                    self.done[jid] = job
+        for record in self._read(self.failures_path):
+            if record['job_id'] not in self.done:
+                self.failures[record['job_id']] = record['error']
 
-# Extract all text from the PDF
+    def _shard_path(self, jid):
+        return os.path.join(self.parsed_dir, f"{jid[:2]}.jsonl")
 
+    def _import_legacy(self):
+        """Move the single parsed.jsonl of the old layout into the shards"""
+        legacy_path = os.path.join(self.directory, "parsed.jsonl")
+        try:
+            parsed_at = os.path.getmtime(legacy_path)
+        except FileNotFoundError:
+            return
+        for record in self._read(legacy_path):
+            self._append(self._shard_path(record['job_id']), dict(record, parsed_at=parsed_at))
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(legacy_path)
 
+    def _read_shard(self, prefix):
+        """{job_id: job} of one shard, rewriting it if it holds expired or superseded records"""
+        cutoff = time.time() - CHECKPOINT_MAX_AGE_DAYS * 86400
+        path = os.path.join(self.parsed_dir, f"{prefix}.jsonl")
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            lines = f.readlines()
+            records = {}
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from an interrupted run; everything before it is intact
+                    continue
+                if record.get('parsed_at', 0) >= cutoff:
+                    records[record['job_id']] = record
+            if len(records) < len(lines):
+                f.seek(0)
+                f.truncate()
+                f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records.values())
+        return {jid: record['job'] for jid, record in records.items()}
+
+    @staticmethod
+    def _read(path):
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    @staticmethod
+    def _append(path, record):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+
+    def record_success(self, jid, job):
+        self._append(self._shard_path(jid), {'job_id': jid, 'job': job, 'parsed_at': time.time()})
+        self.done[jid] = job
+        self.failures.pop(jid, None)
+
+    def record_failure(self, jid, error):
+        self._append(self.failures_path, {'job_id': jid, 'error': error})
+        self.failures[jid] = error
+
+    def finish(self):
+        """Drop the run's failure list if nothing failed for good, else rewrite it without retried jobs"""
+        run_dir = os.path.dirname(self.failures_path)
+        if not self.failures:
+            shutil.rmtree(run_dir, ignore_errors=True)
+            return
+        tmp_path = f"{self.failures_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps({'job_id': jid, 'error': e}, ensure_ascii=False) + "\n"
+                         for jid, e in self.failures.items())
+        os.replace(tmp_path, self.failures_path)
+
+
+def enrich_job(row):
+    """Run the parser prompt for one scraped row, retrying malformed replies"""
+    prompt_with_data = prompt.replace('##input_job##', str(row))
+    last_error = None
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            res = get_llm().invoke(prompt_with_data)
+            return parse_job_response(res.content)
+        except (ValueError, json.JSONDecodeError) as e:
+            last_error = e
+    raise ValueError(f"Unparseable model output after {MAX_ATTEMPTS} attempts: {last_error}")
+
+
+def get_job_list(df, checkpoint_dir=CHECKPOINT_DIR, retry_failed=True):
+    """Enrich every row of df, reusing checkpointed parses and skipping rows that fail"""
+    job_ids = [job_id(df.iloc[i]) for i in range(len(df))]
+    prune_checkpoints(checkpoint_dir)
+    checkpoint = EnrichmentCheckpoint(checkpoint_dir, job_ids)
+    l = []
+    failed = 0
+    for i, jid in enumerate(job_ids):
+        row = df.iloc[i]
+        if jid in checkpoint.done:
+            l.append(checkpoint.done[jid])
+            continue
+        if not retry_failed and jid in checkpoint.failures:
+            continue
+        try:
+            doc_json = enrich_job(row)
+        except Exception as e:
+            print(f"---Failed to enrich job {jid}: {e}")
+            checkpoint.record_failure(jid, str(e))
+            failed += 1
+            continue
+        doc_json['job_id'] = jid
+        checkpoint.record_success(jid, doc_json)
+        l.append(doc_json)
+    checkpoint.finish()
+    print(f"---Enriched {len(l)} of {len(df)} jobs ({failed} failed)---")
+    return l
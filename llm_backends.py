@@ -0,0 +1,146 @@
+"""LLM backends used by the job and resume parsers.
+
+The backend is chosen with the LLM_BACKEND environment variable:
+
+remote  Hugging Face inference endpoint (default)
+local   CPU model, llama.cpp for a .gguf file or transformers otherwise
+replay  serve responses recorded earlier, with optional simulated latency
+record  call LLM_RECORD_BACKEND and store every response for later replay
+"""
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import threading
+import time
+load_dotenv()
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "remote")
+LLM_REPO_ID = os.getenv("LLM_REPO_ID", "deepseek-ai/DeepSeek-R1-Distill-Llama-8B")
+LLM_LOCAL_MODEL = os.getenv("LLM_LOCAL_MODEL", "Qwen/Qwen2.5-0.5B-Instruct")
+LLM_THREADS = int(os.getenv("LLM_THREADS", str(os.cpu_count() or 1)))
+LLM_MAX_NEW_TOKENS = int(os.getenv("LLM_MAX_NEW_TOKENS", "1024"))
+LLM_REPLAY_PATH = os.getenv("LLM_REPLAY_PATH", os.path.join(".cache", "llm_replay.jsonl"))
+LLM_REPLAY_LATENCY_MS = float(os.getenv("LLM_REPLAY_LATENCY_MS", "0"))
+LLM_RECORD_BACKEND = os.getenv("LLM_RECORD_BACKEND", "remote")
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+class LLMResponse:
+    """Minimal stand-in for a chat message; callers only read .content"""
+
+    def __init__(self, content):
+        self.content = content
+
+
+def prompt_key(prompt):
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+class RemoteBackend:
+    """Chat model served by a Hugging Face inference endpoint"""
+
+    def __init__(self, repo_id=LLM_REPO_ID):
+        from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+
+        llm = HuggingFaceEndpoint(
+            repo_id=repo_id,
+            task="text-generation"
+        )
+        self.model = ChatHuggingFace(llm=llm)
+
+    def invoke(self, prompt):
+        return LLMResponse(self.model.invoke(prompt).content)
+
+
+class LocalBackend:
+    """Small chat model running on the CPU, no network required"""
+
+    def __init__(self, model=LLM_LOCAL_MODEL, threads=LLM_THREADS, max_new_tokens=LLM_MAX_NEW_TOKENS):
+        self.max_new_tokens = max_new_tokens
+        if model.endswith(".gguf"):
+            from llama_cpp import Llama
+
+            self.llama = Llama(model_path=model, n_ctx=8192, n_threads=threads, verbose=False)
+            self.pipeline = None
+        else:
+            import torch
+            from transformers import pipeline
+
+            torch.set_num_threads(threads)
+            self.llama = None
+            self.pipeline = pipeline("text-generation", model=model, device=-1)
+
+    def invoke(self, prompt):
+        messages = [{"role": "user", "content": prompt}]
+        if self.llama is not None:
+            out = self.llama.create_chat_completion(messages=messages, max_tokens=self.max_new_tokens)
+            return LLMResponse(out["choices"][0]["message"]["content"])
+        out = self.pipeline(messages, max_new_tokens=self.max_new_tokens, do_sample=False)
+        return LLMResponse(out[0]["generated_text"][-1]["content"])
+
+
+class ReplayBackend:
+    """Serves stored responses keyed by prompt hash, sleeping latency_ms per call"""
+
+    def __init__(self, path=LLM_REPLAY_PATH, latency_ms=LLM_REPLAY_LATENCY_MS):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.responses = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    self.responses[record['key']] = record['content']
+
+    def invoke(self, prompt):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        key = prompt_key(prompt)
+        if key not in self.responses:
+            raise LookupError(f"No recorded response for prompt {key[:12]} in {self.path}")
+        return LLMResponse(self.responses[key])
+
+
+class RecordingBackend:
+    """Wraps another backend and appends every response to a replay file"""
+
+    def __init__(self, backend, path=LLM_REPLAY_PATH):
+        self.backend = backend
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def invoke(self, prompt):
+        res = self.backend.invoke(prompt)
+        record = {'key': prompt_key(prompt), 'content': res.content}
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return res
+
+
+def make_backend(name):
+    if name == "remote":
+        return RemoteBackend()
+    if name == "local":
+        return LocalBackend()
+    if name == "replay":
+        return ReplayBackend()
+    if name == "record":
+        return RecordingBackend(make_backend(LLM_RECORD_BACKEND))
+    raise ValueError(f"Unknown LLM_BACKEND {name!r}; expected remote, local, replay or record")
+
+
+def get_llm(name=None):
+    """Backend for this process, built on first use"""
+    name = name or LLM_BACKEND
+    backend = _backends.get(name)
+    if backend is None:
+        # Threads asking at once must not each load a model
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                backend = _backends[name] = make_backend(name)
+    return backend
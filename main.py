@@ -1,12 +1,18 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from scrape_jobs import JobScraper
 import time
 from datetime import datetime
 import re
-from doc_loader import load_docs
+import threading
+from dashboard_data import DashboardData, dataset_version
+from embeddings import embedding_metrics, warm_up
+from job_history import get_job_history, history_available
+from pipeline import scrape_and_match
+from workers import QueueFull, get_pool
+
+TABLE_PAGE_SIZE = 100
+TABLE_COLUMNS = ['title', 'company', 'location', 'experience', 'salary', 'posted_date', 'source', 'skills_text',
+                 'job_link']
 
 # Page configuration
 st.set_page_config(
@@ -57,7 +63,16 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def start_embedding_warmup():
+    """Load the shared embedding model in the background, once per server process"""
+    thread = threading.Thread(target=warm_up, name="embedding-warmup", daemon=True)
+    thread.start()
+    return thread
+
 def main():
+    start_embedding_warmup()
+
     # Header
     st.markdown('<h1 class="main-header">💼 AI Job Scraper Dashboard </h1>', unsafe_allow_html=True)
     st.markdown("---")
@@ -92,6 +107,12 @@ def main():
             help="Run browser in background (faster but no visual feedback)"
         )
 
+        force_refresh = st.checkbox(
+            "Force refresh",
+            value=False,
+            help="Scrape again even if the same search was run recently"
+        )
+
         uploaded_file = st.file_uploader(
             "Upload resume for AI matching", 
             type="pdf",
@@ -102,64 +123,49 @@ def main():
             type="primary",
             use_container_width=True
         )
+
+        metrics = embedding_metrics()
+        if metrics['load_seconds'] is not None:
+            with st.expander("⚙️ Embedding model"):
+                st.caption(f"{metrics['model']} ({metrics['backend']}) loaded in {metrics['load_seconds']:.1f}s")
+                if metrics['docs_per_sec']:
+                    st.caption(f"{metrics['documents']} docs encoded at {metrics['docs_per_sec']:.1f} docs/s")
+                cache = metrics['cache']
+                if cache and cache['hit_rate'] is not None:
+                    st.caption(f"Embedding cache: {cache['rows']} vectors, {cache['hit_rate']:.0%} hit rate")
     
     # Main content area
     if scrape_button:
         if not job_title.strip():
             st.error("Please enter a job title to search for.")
             return
-        
-        # Progress tracking
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
+
+        # The search runs on the shared worker pool; this script run only records the job id
         try:
-            # Initialize scraper
-            status_text.text("Initializing web scraper...")
-            progress_bar.progress(10)
-            
-            with JobScraper(headless=headless_mode) as scraper:
-                status_text.text("Scraping jobs from LinkedIn and Naukri...")
-                progress_bar.progress(30)
-                
-                # Scrape jobs
-                df = scraper.scrape_all_jobs(job_title, location, max_pages)
-                progress_bar.progress(50)
-
-                try:
-                    ai_job_list=load_docs(uploaded_file,df)
-                    progress_bar.progress(80)
-                except Exception as e:
-                    status_text.text(f"Not able to generate AI Jobs: {e}")
-                    st.warning(f"Not able to generate the AI matched Jobs: {e}")
-                    ai_job_list=[]
-
-                
-                status_text.text("Processing results...")
-                progress_bar.progress(100)
-                
-                # Store results in session state
-                
-                st.session_state.job_data = df
-                st.session_state.ai_job_list=ai_job_list
-                st.session_state.search_params = {
-                    'job_title': job_title,
-                    'location': location,
-                    'max_pages': max_pages,
-                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    
-                }
-                
-                status_text.text("✅ Scraping completed successfully!")
-                time.sleep(1)
-                status_text.empty()
-                progress_bar.empty()
-                
-        except Exception as e:
-            st.error(f"An error occurred during scraping: {str(e)}")
-            st.info("Please check your internet connection and try again.")
+            st.session_state.search_job = get_pool().submit(
+                scrape_and_match, job_title, location, max_pages,
+                headless=headless_mode,
+                resume=uploaded_file.getvalue() if uploaded_file is not None else None,
+                force_refresh=force_refresh,
+                name=f"search:{job_title}",
+            )
+        except QueueFull:
+            st.error("The server is busy with other searches. Please try again in a minute.")
             return
-    
+        st.session_state.pending_search_params = {
+            'job_title': job_title,
+            'location': location,
+            'max_pages': max_pages,
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    if poll_search_job():
+        return
+
+    if st.session_state.get('ai_warning'):
+        st.warning(st.session_state.pop('ai_warning'))
+    poll_enrichment()
+
     # Display results if available
     if 'job_data' in st.session_state and not st.session_state.job_data.empty:
         display_results(st.session_state.job_data, st.session_state.ai_job_list, st.session_state.search_params)
@@ -172,51 +178,131 @@ def main():
         # Sample data preview
         sample_data = create_sample_data()
         display_results(sample_data, [],{
+            'version': 'sample',
             'job_title': 'Sample Jobs',
             'location': 'Various',
             'max_pages': 2,
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }, is_sample=True)
 
+    if history_available():
+        display_history()
+
+@st.fragment(run_every="1s")
+def poll_search_job():
+    """Show progress of this session's background search and collect its result when done.
+
+    Returns True while the search is still running.
+    """
+    job_id = st.session_state.get('search_job')
+    if job_id is None:
+        return False
+    job = get_pool().get(job_id)
+    if job is None:
+        st.session_state.search_job = None
+        st.warning("The search was lost (the server may have restarted). Please start it again.")
+        return False
+    if not job.done:
+        st.progress(job.progress)
+        st.text(job.message)
+        return True
+
+    st.session_state.search_job = None
+    if job.status == "failed":
+        st.error(f"An error occurred during scraping: {job.error}")
+        st.info("Please check your internet connection and try again.")
+        return False
+    result = job.result
+    if result['ai_error']:
+        st.session_state.ai_warning = f"Not able to generate the AI matched Jobs: {result['ai_error']}"
+    st.session_state.job_data = result['job_data']
+    st.session_state.ai_job_list = result['ai_job_list']
+    st.session_state.ai_enrichment = result['ai_enrichment']
+    st.session_state.search_params = dict(st.session_state.pending_search_params,
+                                          scraped_at=result['scraped_at'], from_cache=result['from_cache'],
+                                          version=dataset_version(result['job_data']))
+    st.rerun()
+
+@st.fragment(run_every="2s")
+def poll_enrichment():
+    """Swap in the LLM-enriched matches once the background enrichment finishes"""
+    future = st.session_state.get('ai_enrichment')
+    if future is None:
+        return
+    if not future.done():
+        st.info("🤖 Enriching the top matches with AI...")
+        return
+    st.session_state.ai_enrichment = None
+    try:
+        st.session_state.ai_job_list = future.result()
+    except Exception as e:
+        st.warning(f"Not able to enrich the AI matched Jobs: {e}")
+    st.rerun()
+
+@st.cache_resource(max_entries=16)
+def dashboard_data(version, _df):
+    """Filter indexes, aggregates and exports for one dataset version, shared by every rerun"""
+    return DashboardData(_df)
+
+@st.cache_resource(max_entries=16)
+def analytics_figures(version, _data):
+    """Plotly figures for the analytics section, built once per dataset version"""
+    import plotly.express as px
+
+    aggregates = _data.aggregates()
+    figures = {}
+    if 'source' in aggregates:
+        source_counts = aggregates['source']
+        figures['source'] = px.pie(
+            values=source_counts.values,
+            names=source_counts.index,
+            title="Jobs by Source",
+            color_discrete_map={'LinkedIn': '#0077b5', 'Naukri': '#4a90e2'}
+        )
+        figures['source'].update_traces(textposition='inside', textinfo='percent+label')
+    if 'company' in aggregates:
+        company_counts = aggregates['company']
+        figures['company'] = px.bar(
+            x=company_counts.values,
+            y=company_counts.index,
+            orientation='h',
+            title="Top 10 Companies",
+            labels={'x': 'Number of Jobs', 'y': 'Company'}
+        )
+        figures['company'].update_layout(yaxis={'categoryorder': 'total ascending'})
+    return figures
+
 def display_results(df, ai_job_list,search_params, is_sample=False):
     """Display the scraped job results"""
-    
+    version = search_params.get('version') or dataset_version(df)
+    data = dashboard_data(version, df)
+
     # Search summary
     col1, col2, col3 = st.columns(3)
+    if 'scraped_at' in search_params:
+        age_minutes = (time.time() - search_params['scraped_at']) / 60
+        origin = "shared cache" if search_params.get('from_cache') else "fresh scrape"
+        st.caption(f"Results scraped {age_minutes:.0f} min ago ({origin}). "
+                   "Tick 'Force refresh' in the sidebar to scrape again.")
     
     st.markdown("---")
     
     # Analytics section
     if len(df) > 0:
         st.subheader("📊 Job Analytics")
+        figures = analytics_figures(version, data)
         
         col1, col2 = st.columns(2)
         
         with col1:
             # Jobs by source
-            source_counts = df['source'].value_counts()
-            fig_source = px.pie(
-                values=source_counts.values,
-                names=source_counts.index,
-                title="Jobs by Source",
-                color_discrete_map={'LinkedIn': '#0077b5', 'Naukri': '#4a90e2'}
-            )
-            fig_source.update_traces(textposition='inside', textinfo='percent+label')
-            st.plotly_chart(fig_source, use_container_width=True)
+            if 'source' in figures:
+                st.plotly_chart(figures['source'], use_container_width=True)
         
         with col2:
             # Top companies
-            if 'company' in df.columns:
-                company_counts = df['company'].value_counts().head(10)
-                fig_companies = px.bar(
-                    x=company_counts.values,
-                    y=company_counts.index,
-                    orientation='h',
-                    title="Top 10 Companies",
-                    labels={'x': 'Number of Jobs', 'y': 'Company'}
-                )
-                fig_companies.update_layout(yaxis={'categoryorder': 'total ascending'})
-                st.plotly_chart(fig_companies, use_container_width=True)
+            if 'company' in figures:
+                st.plotly_chart(figures['company'], use_container_width=True)
     
     # Filters
     st.subheader("🔍 Filter Results")
@@ -225,122 +311,154 @@ def display_results(df, ai_job_list,search_params, is_sample=False):
     with col1:
         source_filter = st.multiselect(
             "Filter by Source",
-            options=df['source'].unique(),
-            default=df['source'].unique()
+            options=data.options('source'),
+            default=data.default_selection('source')
         )
     
     with col2:
-        if 'company' in df.columns:
-            companies = df['company'].unique()
-            company_filter = st.multiselect(
-                "Filter by Company",
-                options=companies,
-                default=companies[:10] if len(companies) > 10 else companies
-            )
-        else:
-            company_filter = []
+        company_filter = st.multiselect(
+            "Filter by Company",
+            options=data.options('company'),
+            default=data.default_selection('company')
+        ) if 'company' in df.columns else []
     
     with col3:
-        if 'location' in df.columns:
-            locations = df['location'].unique()
-            location_filter = st.multiselect(
-                "Filter by Location",
-                options=locations,
-                default=locations[:10] if len(locations) > 10 else locations
-            )
-        else:
-            location_filter = []
+        location_filter = st.multiselect(
+            "Filter by Location",
+            options=data.options('location'),
+            default=data.default_selection('location')
+        ) if 'location' in df.columns else []
     
     # Apply filters
-    filtered_df = df[df['source'].isin(source_filter)]
-    if company_filter and 'company' in df.columns:
-        filtered_df = filtered_df[filtered_df['company'].isin(company_filter)]
-    if location_filter and 'location' in df.columns:
-        filtered_df = filtered_df[filtered_df['location'].isin(location_filter)]
+    positions = data.filter_positions({
+        'source': source_filter,
+        'company': company_filter,
+        'location': location_filter,
+    })
+    file_name = f"jobs_{search_params['job_title'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     
     # Job listings
     if len(ai_job_list)!=0:
         st.subheader(f"💼 AI Matched Job Listings ({len(ai_job_list)} jobs)")
         
-        if len(ai_job_list) > 0:
-            # Pagination
-            jobs_per_page = 4
-            total_pages = (len(ai_job_list) - 1) // jobs_per_page + 1
-            
-            if total_pages > 1:
-                page = st.selectbox("Page", range(1, total_pages + 1))
-                start_idx = (page - 1) * jobs_per_page
-                end_idx = start_idx + jobs_per_page
-                page_df = ai_job_list.iloc[start_idx:end_idx]
-            else:
-                page_df = ai_job_list
-            
-            # Display jobs
-            for idx, job in page_df.iterrows():
-                display_job_card(job)
+        # Pagination
+        jobs_per_page = 4
+        total_pages = (len(ai_job_list) - 1) // jobs_per_page + 1
+        
+        if total_pages > 1:
+            page = st.selectbox("Page", range(1, total_pages + 1))
+            start_idx = (page - 1) * jobs_per_page
+            page_df = ai_job_list.iloc[start_idx:start_idx + jobs_per_page]
+        else:
+            page_df = ai_job_list
+        
+        display_job_cards(page_df)
         st.markdown("---")
         col1, col2 = st.columns([1, 4])
         with col1:
-            csv = filtered_df.to_csv(index=False)
-            st.download_button(
-                label="📥 Download CSV",
-                data=csv,
-                file_name=f"jobs_{search_params['job_title'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
-            )
+            export_button("CSV", f"{version}-{len(positions)}-{hash(positions.tobytes())}",
+                          lambda: data.csv_bytes(positions), file_name)
         st.markdown("---")
         col1, col2 = st.columns([1, 4])
         with col1:
-            csv = ai_job_list.to_csv(index=False)
-            st.download_button(
-                label="📥 Download AI matched JOB CSV",
-                data=csv,
-                file_name=f"jobs_{search_params['job_title'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
-            )
-    elif len(filtered_df) !=0:
-        st.subheader(f"💼 Job Listings ({len(filtered_df)} jobs)")
+            export_button("AI matched JOB CSV", f"ai-{version}-{len(ai_job_list)}",
+                          lambda: ai_job_list.to_csv(index=False).encode("utf-8"), file_name)
+    elif len(positions) !=0:
+        st.subheader(f"💼 Job Listings ({len(positions)} jobs)")
         
-        if len(filtered_df) > 0:
-            # Pagination
-            jobs_per_page = 4
-            total_pages = (len(filtered_df) - 1) // jobs_per_page + 1
-            
-            if total_pages > 1:
-                page = st.selectbox("Page", range(1, total_pages + 1))
-                start_idx = (page - 1) * jobs_per_page
-                end_idx = start_idx + jobs_per_page
-                page_df = filtered_df.iloc[start_idx:end_idx]
-            else:
-                page_df = filtered_df
-            
-            # Display jobs
-            for idx, job in page_df.iterrows():
-                display_job_card(job)
-            
-            # Download option
+        view = st.radio("View", ["Cards", "Table"], horizontal=True, label_visibility="collapsed")
+        # Only one page is ever sent to the browser, however many jobs match
+        jobs_per_page = 4 if view == "Cards" else TABLE_PAGE_SIZE
+        total_pages = (len(positions) - 1) // jobs_per_page + 1
+        page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, value=1) \
+            if total_pages > 1 else 1
+        page_df = data.page(positions, page, jobs_per_page)
+        
+        if view == "Cards":
+            display_job_cards(page_df)
+        else:
+            st.dataframe(page_df[[c for c in TABLE_COLUMNS if c in page_df.columns]],
+                         use_container_width=True, hide_index=True)
+        
+        # Download option
         st.markdown("---")
         col1, col2 = st.columns([1, 4])
         with col1:
-            csv = filtered_df.to_csv(index=False)
-            st.download_button(
-                label="📥 Download CSV",
-                data=csv,
-                file_name=f"jobs_{search_params['job_title'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
-            )
+            export_button("CSV", f"{version}-{len(positions)}-{hash(positions.tobytes())}",
+                          lambda: data.csv_bytes(positions), file_name)
         
     else:
         st.info("No jobs match the selected filters.")
 
-def display_job_card(job):
-    """Display individual job card"""
-    
+@st.cache_data(ttl=60, show_spinner=False)
+def history_panels(days):
+    """Rollup queries for the trends section; the rollups change only when a scrape is logged"""
+    history = get_job_history()
+    return {
+        'per_day': history.jobs_per_day(days),
+        'skills': history.top_skills(days),
+        'companies': history.top('company', days),
+        'locations': history.ranges('location', days),
+    }
+
+def display_history():
+    """Trends across every search logged in the job history"""
+    import plotly.express as px
+
+    st.markdown("---")
+    st.subheader("📈 Market Trends")
+    days = st.select_slider("Time window (days)", options=[7, 30, 90, 365], value=30)
+    try:
+        panels = history_panels(days)
+    except Exception as e:
+        st.warning(f"Job history is not available: {e}")
+        return
+    if panels['per_day'].empty:
+        st.info("Trends appear here once some searches have been run.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(px.line(panels['per_day'], x='day', y='jobs', color='source', markers=True,
+                                title="New Postings per Day"), use_container_width=True)
+        skills = panels['skills']
+        fig_skills = px.bar(skills, x='jobs', y='skill', orientation='h', title="Most Requested Skills",
+                            labels={'jobs': 'Postings', 'skill': 'Skill'})
+        fig_skills.update_layout(yaxis={'categoryorder': 'total ascending'})
+        st.plotly_chart(fig_skills, use_container_width=True)
+    with col2:
+        companies = panels['companies']
+        fig_companies = px.bar(companies, x='jobs', y='company', orientation='h', title="Most Active Companies",
+                               labels={'jobs': 'Postings', 'company': 'Company'})
+        fig_companies.update_layout(yaxis={'categoryorder': 'total ascending'})
+        st.plotly_chart(fig_companies, use_container_width=True)
+        locations = panels['locations'].rename(columns={
+            'location': 'Location', 'jobs': 'Postings',
+            'salary_min_avg': 'Avg min salary (LPA)', 'salary_max_avg': 'Avg max salary (LPA)',
+            'exp_min_avg': 'Avg min exp (yrs)', 'exp_max_avg': 'Avg max exp (yrs)'})
+        st.caption("Salary and experience by location")
+        st.dataframe(locations[['Location', 'Postings', 'Avg min salary (LPA)', 'Avg max salary (LPA)',
+                                'Avg min exp (yrs)', 'Avg max exp (yrs)']].round(1),
+                     use_container_width=True, hide_index=True)
+
+def export_button(label, export_id, make_csv, file_name):
+    """Build the CSV only once the user asks for it, then offer the download"""
+    if st.session_state.get(f"export_{label}") != export_id:
+        if not st.button(f"📄 Prepare {label}", key=f"prepare_{label}"):
+            return
+        st.session_state[f"export_{label}"] = export_id
+    st.download_button(
+        label=f"📥 Download {label}",
+        data=make_csv(),
+        file_name=file_name,
+        mime="text/csv",
+        key=f"download_{label}"
+    )
+
+def job_card_html(job):
+    """HTML for one job card, including its link"""
     job_link = job.get('job_link', '#')
     link_text = "🔗 View Job" if job_link != "N/A" and job_link != "#" else "Link not available"
-    print(job['title'])
-    # Build job card HTML
-
 
     card_html = f"""
     <div class="job-card" style="margin-bottom: 2rem;">
@@ -361,13 +479,16 @@ def display_job_card(job):
     
     card_html += "</div>"
     
-    st.markdown(card_html, unsafe_allow_html=True)
-    
-    # Add link button if available
+    # Add link if available
     if job_link != "N/A" and job_link != "#":
-        st.markdown(f'<a href="{job_link}" target="_blank" style="text-decoration: none;">{link_text}</a>', unsafe_allow_html=True)
+        card_html += f'<a href="{job_link}" target="_blank" style="text-decoration: none;">{link_text}</a>'
     
-    st.markdown("---")
+    return card_html + "<hr>"
+
+def display_job_cards(page_df):
+    """Render a page of job cards in a single markdown call"""
+    html = "".join(job_card_html(job) for _, job in page_df.iterrows())
+    st.markdown(html, unsafe_allow_html=True)
 
 def create_sample_data():
     """Create sample data for demonstration"""
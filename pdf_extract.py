@@ -0,0 +1,133 @@
+"""Bounded, fast text extraction for resume PDFs.
+
+Modes (PDF_EXTRACT_MODE):
+
+layout  pdfminer's default LAParams, same output as extract_text()
+fast    LAParams(boxes_flow=None): skips the hierarchical ordering of text boxes,
+        the slow part of layout analysis; every other parameter is the default
+raw     no layout analysis at all; text comes out in content-stream order
+
+Only the first PDF_MAX_PAGES pages are read. Documents with at least
+PDF_PARALLEL_MIN_PAGES pages are split into page ranges and extracted in one
+shared pool of PDF_WORKERS processes, started with "spawn" on first use so
+workers are not forked from a process with threads running.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import io
+import multiprocessing
+import os
+import resource
+import threading
+import time
+import tracemalloc
+
+PDF_EXTRACT_MODE = os.getenv("PDF_EXTRACT_MODE", "fast")
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "10"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+MODES = ("layout", "fast", "raw")
+
+
+def make_laparams(mode):
+    from pdfminer.layout import LAParams
+
+    if mode == "layout":
+        return LAParams()
+    if mode == "fast":
+        return LAParams(boxes_flow=None)
+    if mode == "raw":
+        return None
+    raise ValueError(f"Unknown PDF extraction mode {mode!r}; expected one of {', '.join(MODES)}")
+
+
+def count_pages(data):
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+
+    doc = PDFDocument(PDFParser(io.BytesIO(data)))
+    pages = resolve1(doc.catalog.get('Pages'))
+    if isinstance(pages, dict) and 'Count' in pages:
+        return int(resolve1(pages['Count']))
+    return sum(1 for _ in PDFPage.create_pages(doc))
+
+
+def _extract_page_range(data, mode, start, stop):
+    """Text of pages [start, stop), one string per page"""
+    from pdfminer.converter import TextConverter
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    rsrcmgr = PDFResourceManager(caching=True)
+    outfp = io.StringIO()
+    converter = TextConverter(rsrcmgr, outfp, codec='utf-8', laparams=make_laparams(mode))
+    interpreter = PDFPageInterpreter(rsrcmgr, converter)
+    texts = []
+    try:
+        for page in PDFPage.get_pages(io.BytesIO(data), pagenos=set(range(start, stop)), maxpages=stop):
+            interpreter.process_page(page)
+            texts.append(outfp.getvalue())
+            outfp.seek(0)
+            outfp.truncate()
+    finally:
+        converter.close()
+    return texts
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide extraction pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def iter_page_texts(pdf, mode=PDF_EXTRACT_MODE, max_pages=PDF_MAX_PAGES, workers=PDF_WORKERS):
+    """Yield the text of each page in order, stopping after max_pages"""
+    data = pdf if isinstance(pdf, (bytes, bytearray)) else pdf.read()
+    n_pages = min(count_pages(data), max_pages) if max_pages else count_pages(data)
+
+    if workers <= 1 or n_pages < PDF_PARALLEL_MIN_PAGES:
+        yield from _extract_page_range(data, mode, 0, n_pages)
+        return
+
+    step = -(-n_pages // workers)
+    ranges = [(start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+    futures = [get_pool().submit(_extract_page_range, data, mode, start, stop) for start, stop in ranges]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def extract_resume_text(pdf, mode=PDF_EXTRACT_MODE, max_pages=PDF_MAX_PAGES, workers=PDF_WORKERS):
+    return "".join(iter_page_texts(pdf, mode=mode, max_pages=max_pages, workers=workers))
+
+
+def extract_with_stats(pdf, mode=PDF_EXTRACT_MODE, max_pages=PDF_MAX_PAGES, workers=PDF_WORKERS, trace_memory=False):
+    """extract_resume_text plus wall time, page count and memory.
+
+    max_rss_mb is the maximum RSS of this process so far, not of this call. With
+    trace_memory, traced_peak_mb is the tracemalloc peak of this call in this process
+    (pool workers are not counted; several times slower, so only for benchmarks).
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    pages = list(iter_page_texts(pdf, mode=mode, max_pages=max_pages, workers=workers))
+    seconds = time.perf_counter() - start
+    stats = {'mode': mode, 'pages': len(pages), 'seconds': seconds,
+             'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    if trace_memory:
+        stats['traced_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return "".join(pages), stats
@@ -0,0 +1,74 @@
+"""The scrape -> enrich -> match pipeline behind the dashboard's search button and the API.
+
+JOB_SCRAPER  selenium (default) to scrape the real boards, or stub for stub_scraper's offline postings
+"""
+from doc_loader import MATCH_MODE, load_docs, match_then_enrich
+from job_history import get_job_history, history_available
+from result_cache import get_result_cache, search_key
+from workers import browser_pool, model_slots
+import os
+
+JOB_SCRAPER = os.getenv("JOB_SCRAPER", "selenium")
+
+
+def scraper_class():
+    if JOB_SCRAPER == "stub":
+        from stub_scraper import StubJobScraper
+        return StubJobScraper
+    if JOB_SCRAPER != "selenium":
+        raise ValueError(f"Unknown JOB_SCRAPER {JOB_SCRAPER!r}; expected selenium or stub")
+    from scrape_jobs import JobScraper
+    return JobScraper
+
+
+def scrape(job, job_title, location="", max_pages=2, headless=True, detailed=True):
+    """Scrape both boards with a pooled browser, starting one only when none is idle"""
+    JobScraper = scraper_class()
+
+    job.update(5, "Waiting for a free browser...")
+    with browser_pool.scraper(lambda: JobScraper(headless=headless), key=(JobScraper, headless),
+                              on_create=lambda: job.update(10, "Initializing web scraper...")) as scraper:
+        job.update(30, "Scraping jobs from LinkedIn and Naukri...")
+        return scraper.scrape_all_jobs(job_title, location, max_pages, detailed)
+
+
+def scrape_and_match(job, job_title, location="", max_pages=2, headless=True, resume=None, detailed=True,
+                     force_refresh=False):
+    """Run one search as a workers.WorkerPool job.
+
+    Scrapes go through the shared result cache, so identical searches from any
+    session reuse (or wait for) the same scrape unless force_refresh is set.
+    Fresh scrapes are also logged to the job history for trend analytics.
+    resume is the raw PDF bytes, or None to skip AI matching. Returns a dict with
+    job_data (every scraped job), scraped_at, from_cache, ai_job_list,
+    ai_enrichment (a future in embed_first mode) and ai_error.
+    """
+    df, scraped_at, from_cache = get_result_cache().get_or_compute(
+        search_key(job_title, location, max_pages, detailed),
+        lambda: scrape(job, job_title, location, max_pages, headless, detailed),
+        force_refresh=force_refresh,
+        on_wait=lambda: job.update(30, "Waiting for an identical search that is already running..."),
+    )
+
+    if not from_cache and history_available():
+        try:
+            get_job_history().append(df, scraped_at)
+        except Exception as e:
+            # Analytics are best effort; the search result still goes back to the user
+            print(f"---Could not record scrape in the job history: {e}---")
+
+    result = {'job_data': df, 'scraped_at': scraped_at, 'from_cache': from_cache,
+              'ai_job_list': [], 'ai_enrichment': None, 'ai_error': None}
+    if resume is not None and not df.empty:
+        job.update(50, "Waiting for the AI matcher...")
+        with model_slots:
+            job.update(60, "Matching jobs to your resume with AI...")
+            try:
+                if MATCH_MODE == "embed_first":
+                    result['ai_job_list'], result['ai_enrichment'] = match_then_enrich(resume, df)
+                else:
+                    result['ai_job_list'] = load_docs(resume, df)
+            except Exception as e:
+                result['ai_error'] = str(e)
+    job.update(100, "Processing results...")
+    return result
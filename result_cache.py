@@ -0,0 +1,170 @@
+"""Scrape results shared across sessions, keyed by the normalized search.
+
+Entries expire after RESULT_CACHE_TTL_SECONDS and are bounded by
+RESULT_CACHE_MEMORY_MB in memory and RESULT_CACHE_DISK_MB on disk (least
+recently used entries go first). Identical searches that arrive while one
+is running wait for it instead of starting their own scrape.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "1800"))
+RESULT_CACHE_MEMORY_MB = float(os.getenv("RESULT_CACHE_MEMORY_MB", "256"))
+RESULT_CACHE_DISK_MB = float(os.getenv("RESULT_CACHE_DISK_MB", "1024"))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(".cache", "results"))
+
+
+def search_key(job_title, location="", max_pages=2, detailed=True):
+    """Same key for searches that differ only in case or whitespace"""
+    normalized = [" ".join(str(job_title).lower().split()), " ".join(str(location).lower().split()),
+                  int(max_pages), bool(detailed)]
+    return hashlib.sha256(json.dumps(normalized).encode('utf-8')).hexdigest()[:32]
+
+
+class ResultCache:
+    def __init__(self, directory=RESULT_CACHE_DIR, ttl=RESULT_CACHE_TTL_SECONDS,
+                 memory_mb=RESULT_CACHE_MEMORY_MB, disk_mb=RESULT_CACHE_DISK_MB):
+        self.directory = directory
+        self.ttl = ttl
+        self.memory_bytes = memory_mb * 2 ** 20
+        self.disk_bytes = disk_mb * 2 ** 20
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pkl")
+
+    def _get_memory(self, key):
+        """(df, created_at) if a fresh entry is in memory; call with the lock held"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[1] <= self.ttl:
+            self.entries.move_to_end(key)
+            return entry[0], entry[1]
+        del self.entries[key]
+        return None
+
+    def _load(self, key):
+        """(df, created_at) if a fresh entry is on disk; runs without the lock"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                df, created_at = pickle.load(f)
+            if time.time() - created_at > self.ttl:
+                os.remove(path)
+                return None
+            os.utime(path)
+        except Exception:
+            # Missing, evicted by another process meanwhile, or unreadable
+            return None
+        return df, created_at
+
+    def _remember(self, key, df, created_at):
+        size = int(df.memory_usage(deep=True).sum())
+        self.entries[key] = (df, created_at, size)
+        self.entries.move_to_end(key)
+        while len(self.entries) > 1 and sum(e[2] for e in self.entries.values()) > self.memory_bytes:
+            self.entries.popitem(last=False)
+
+    def _persist(self, key, df, created_at):
+        tmp_path = self._path(key) + f".{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((df, created_at), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files[:-1]:
+            if total <= self.disk_bytes:
+                break
+            total -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get_or_compute(self, key, compute, force_refresh=False, on_wait=None):
+        """(df, created_at, from_cache). compute() runs at most once per key at a time.
+
+        force_refresh skips a cached entry but still joins a scrape that is already running.
+        on_wait is called before blocking on someone else's scrape. Empty results are
+        handed to the waiters but not cached, so a blocked scrape is retried next time.
+        """
+        if not force_refresh:
+            with self._lock:
+                hit = self._get_memory(key)
+            if hit is None:
+                hit = self._load(key)
+                if hit is not None:
+                    with self._lock:
+                        self._remember(key, *hit)
+            if hit is not None:
+                return hit[0].copy(), hit[1], True
+
+        with self._lock:
+            # Someone may have finished the same scrape while we looked on disk
+            hit = None if force_refresh else self._get_memory(key)
+            future = self.inflight.get(key)
+            owner = hit is None and future is None
+            if owner:
+                future = self.inflight[key] = Future()
+        if hit is not None:
+            return hit[0].copy(), hit[1], True
+
+        if not owner:
+            if on_wait is not None:
+                on_wait()
+            df, created_at = future.result()
+            return df.copy(), created_at, True
+
+        try:
+            df = compute()
+            created_at = time.time()
+        except BaseException as e:
+            with self._lock:
+                self.inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        cacheable = not df.empty
+        with self._lock:
+            if cacheable:
+                self._remember(key, df, created_at)
+            self.inflight.pop(key, None)
+        future.set_result((df, created_at))
+        if cacheable:
+            try:
+                self._persist(key, df, created_at)
+            except Exception as e:
+                # The memory tier still has it; the disk tier is best effort
+                print(f"---Could not write scrape results to the disk cache: {e}---")
+        return df.copy(), created_at, False
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """The process-wide cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
@@ -1,26 +1,30 @@
-from pdfminer.high_level import extract_text
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from huggingface_hub import login
-from langchain_core.tools import tool
+from collections import OrderedDict
 from dotenv import load_dotenv
 from datetime import date
+from llm_backends import get_llm
+import hashlib
 import json
 import os
+import tempfile
+import threading
+import time
 load_dotenv()
 hf_token = os.getenv("HF_TOKEN")
 
 
 today = date.today()
 
+# Bump whenever the prompt changes so cached parses from the old prompt are ignored
+PROMPT_VERSION = "1"
+RESUME_CACHE_DIR = os.getenv("RESUME_CACHE_DIR", os.path.join(".cache", "resume"))
+# Cached resumes hold personal data: drop them after this long, and keep the directory bounded
+RESUME_CACHE_MAX_AGE_DAYS = float(os.getenv("RESUME_CACHE_MAX_AGE_DAYS", "30"))
+RESUME_CACHE_DISK_MB = float(os.getenv("RESUME_CACHE_DISK_MB", "64"))
+RESUME_CACHE_MEMORY_ENTRIES = int(os.getenv("RESUME_CACHE_MEMORY_ENTRIES", "128"))
 
-llm = HuggingFaceEndpoint(
-    repo_id="deepseek-ai/DeepSeek-R1-Distill-Llama-8B",
-    task="text-generation"
-    
-)
-
-
-model = ChatHuggingFace(llm=llm)
+# key -> (entry, stored_at), least recently used first
+_resume_cache = OrderedDict()
+_resume_cache_lock = threading.Lock()
 
 prompt="""
 You are an intelligent resume parser.
@@ -44,19 +48,144 @@ Use only the information found in the input text. If any field is missing or not
 Input Resume:
 ##input_resume##
 """
-def get_resume(pdf):
-    print('------Parsing resume---------')
-    text = extract_text(pdf,codec='utf-8')
+def parse_resume_text(text):
+    """Run the resume prompt over already extracted text"""
     prompt_with_data=prompt.replace('##input_resume##',text)
     prompt_with_data=prompt_with_data.replace('##date##',str(today))
 
-    res=model.invoke(prompt_with_data)
+    res=get_llm().invoke(prompt_with_data)
     res_final=res.content.split("```python")
     res_final=res_final[1].split("```")
-    print('------Parsing resume completed---------')
     return res_final
 
 
+def resume_query_text(parsed):
+    """Text to match jobs against; get_resume returns the split model reply"""
+    if isinstance(parsed, str):
+        return parsed
+    return "\n".join(part for part in parsed if part.strip())
+
+
+def read_pdf_bytes(pdf):
+    """Raw bytes of an uploaded file, file object, path or bytes"""
+    if isinstance(pdf, (bytes, bytearray)):
+        return bytes(pdf)
+    if isinstance(pdf, (str, os.PathLike)):
+        with open(pdf, 'rb') as f:
+            return f.read()
+    if hasattr(pdf, 'getvalue'):
+        return pdf.getvalue()
+    pos = pdf.tell()
+    data = pdf.read()
+    pdf.seek(pos)
+    return data
+
+
+def resume_cache_key(data):
+    """Cache key of a resume file; the extracted text, and so the parse, depend on the extraction settings too"""
+    from pdf_extract import PDF_EXTRACT_MODE, PDF_MAX_PAGES
+
+    return f"{hashlib.sha256(data).hexdigest()}-{PDF_EXTRACT_MODE}-p{PDF_MAX_PAGES}-v{PROMPT_VERSION}"
+
+
+def _cache_path(key):
+    return os.path.join(RESUME_CACHE_DIR, key + ".json")
+
+
+def _remember(key, entry, stored_at):
+    with _resume_cache_lock:
+        _resume_cache[key] = (entry, stored_at)
+        _resume_cache.move_to_end(key)
+        while len(_resume_cache) > RESUME_CACHE_MEMORY_ENTRIES:
+            _resume_cache.popitem(last=False)
+
+
+def _load_cached(key):
+    max_age = RESUME_CACHE_MAX_AGE_DAYS * 86400
+    with _resume_cache_lock:
+        if key in _resume_cache:
+            entry, stored_at = _resume_cache[key]
+            if time.time() - stored_at <= max_age:
+                _resume_cache.move_to_end(key)
+                return entry
+            del _resume_cache[key]
+    path = _cache_path(key)
+    try:
+        stored_at = os.path.getmtime(path)
+        if time.time() - stored_at > max_age:
+            os.remove(path)
+            return {}
+        with open(path, encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        # Missing, removed by another process meanwhile, or unreadable
+        return {}
+    _remember(key, entry, stored_at)
+    return entry
+
+
+def prune_resume_cache(directory=RESUME_CACHE_DIR):
+    """Delete cached resumes older than RESUME_CACHE_MAX_AGE_DAYS, then the oldest beyond RESUME_CACHE_DISK_MB"""
+    cutoff = time.time() - RESUME_CACHE_MAX_AGE_DAYS * 86400
+    files = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+            if stat.st_mtime < cutoff:
+                os.remove(path)
+                continue
+        except FileNotFoundError:
+            continue  # removed by another process
+        if name.endswith(".json"):
+            files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files[:-1]:
+        if total <= RESUME_CACHE_DISK_MB * 2 ** 20:
+            break
+        total -= size
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _store_cached(key, entry):
+    _remember(key, entry, time.time())
+    os.makedirs(RESUME_CACHE_DIR, exist_ok=True)
+    # A unique temp file per write: threads of one process may store the same resume at once
+    fd, tmp_path = tempfile.mkstemp(dir=RESUME_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp_path, _cache_path(key))
+    prune_resume_cache()
+
+
+def get_resume(pdf):
+    """Parse a resume PDF, reusing the cached text and parse for identical files"""
+    data = read_pdf_bytes(pdf)
+    key = resume_cache_key(data)
+    entry = dict(_load_cached(key))
+    if 'parsed' in entry:
+        print('------Using cached resume parse---------')
+        return entry['parsed']
+
+    print('------Parsing resume---------')
+    if 'text' not in entry:
+        from pdf_extract import extract_with_stats
+
+        entry['text'], stats = extract_with_stats(data)
+        print(f"------Extracted {stats['pages']} pages ({stats['mode']}) in {stats['seconds']:.2f}s, "
+              f"process max RSS {stats['max_rss_mb']:.1f} MB---------")
+        # Keep the text even if the LLM call below fails
+        _store_cached(key, entry)
+    entry['parsed'] = parse_resume_text(entry['text'])
+    _store_cached(key, entry)
+    print('------Parsing resume completed---------')
+    return entry['parsed']
+
+
 
 
 
@@ -0,0 +1,224 @@
+"""Sparse skill and keyword index used to shortlist jobs before dense scoring.
+
+Each posting is indexed by its normalized skills (skill -> posting ids) and
+by the terms of its description for BM25. A resume's skills and text pick a
+shortlist cheaply; only the shortlist is scored with embeddings. The
+postings live in the job index's SQLite file.
+"""
+from collections import Counter, defaultdict
+import ast
+import math
+import os
+import re
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Each matched skill counts as much as this many BM25 points when ranking the shortlist
+SKILL_WEIGHT = 2.0
+BM25_MAX_QUERY_TERMS = int(os.getenv("BM25_MAX_QUERY_TERMS", "32"))
+BM25_MAX_DF_RATIO = float(os.getenv("BM25_MAX_DF_RATIO", "0.1"))
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_STOPWORDS = {"a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on",
+              "or", "the", "to", "we", "with", "you", "your", "our", "will", "this", "that", "have", "has"}
+
+
+def normalize_skill(skill):
+    return re.sub(r"\s+", " ", str(skill)).strip(" -•*\t").lower()
+
+
+def split_skills(value):
+    """Skills from a list, or a comma/bullet/newline separated string"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        if value.strip() in ("", "N/A"):
+            return []
+        parts = re.split(r"[,;\n•]", value)
+    else:
+        parts = list(value)
+    return [s for s in (normalize_skill(p) for p in parts) if s and s != "n/a"]
+
+
+def job_skills(job):
+    """Normalized skills of a job from the scraper's skills/skills_text or the LLM's skills field"""
+    skills = set()
+    for field in ("skills", "skills_text", "Skills"):
+        skills.update(split_skills(job.get(field)))
+    return skills
+
+
+def resume_skills(parsed):
+    """The "Skills" list from a resume parse (the python dict the resume prompt asks for)"""
+    text = parsed if isinstance(parsed, str) else "\n".join(parsed)
+    try:
+        data = ast.literal_eval(text.strip())
+        if isinstance(data, dict):
+            return set(split_skills(data.get("Skills")))
+    except (ValueError, SyntaxError):
+        pass
+    found = re.search(r"[\"']Skills[\"']\s*:\s*\[(.*?)\]", text, flags=re.DOTALL)
+    if not found:
+        return set()
+    return set(split_skills(re.findall(r"[\"']([^\"']+)[\"']", found.group(1))))
+
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall(str(text).lower()) if t not in _STOPWORDS]
+
+
+class SkillIndex:
+    """Skill postings and BM25 term postings in SQLite tables next to job_index's jobs table.
+
+    Each posting id gets a small integer slot (freed slots are reused), so a query can sum
+    scores with numpy.bincount. Term postings store their BM25 weight, computed on insert
+    with the average document length at that time, so a query only adds idf * weight.
+    Queries use at most BM25_MAX_QUERY_TERMS of their rarest terms and skip terms found in
+    more than BM25_MAX_DF_RATIO of the postings. The postings of queried skills and terms
+    are cached as arrays until this connection changes them or another one commits.
+    Changes share the connection's transaction, so they commit together with the jobs.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS skill_docs (id INTEGER PRIMARY KEY, slot INTEGER NOT NULL UNIQUE,
+                                                   length INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS skill_postings (skill TEXT NOT NULL, slot INTEGER NOT NULL,
+                                                       PRIMARY KEY (skill, slot)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS skill_postings_slot ON skill_postings (slot);
+            CREATE TABLE IF NOT EXISTS term_postings (term TEXT NOT NULL, slot INTEGER NOT NULL, weight REAL NOT NULL,
+                                                      PRIMARY KEY (term, slot)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS term_postings_slot ON term_postings (slot);
+            CREATE TABLE IF NOT EXISTS term_df (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+        self._postings = {}
+        self._data_version = None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM skill_docs").fetchone()[0]
+
+    def _in_chunks(self, sql, values):
+        """Rows of sql (with an {ids} placeholder list) over values, 500 at a time"""
+        values = list(values)
+        for offset in range(0, len(values), 500):
+            chunk = values[offset:offset + 500]
+            yield from self.conn.execute(sql.format(ids=",".join("?" * len(chunk))), chunk)
+
+    def missing(self, ids):
+        """The ids that have no postings yet"""
+        ids = list(ids)
+        found = {row[0] for row in self._in_chunks("SELECT id FROM skill_docs WHERE id IN ({ids})", ids)}
+        return [doc_id for doc_id in ids if doc_id not in found]
+
+    def add_many(self, docs):
+        """Index (doc_id, job) pairs, replacing earlier postings of the same ids"""
+        docs = dict(docs)
+        if not docs:
+            return
+        self.remove_many(docs)
+        used = {row[0] for row in self.conn.execute("SELECT slot FROM skill_docs")}
+        free = (slot for slot in range(len(used) + len(docs)) if slot not in used)
+        slots = {doc_id: next(free) for doc_id in docs}
+        skills = {doc_id: job_skills(job) for doc_id, job in docs.items()}
+        terms = {doc_id: Counter(tokenize(job.get("description", "")) + tokenize(job.get("title", "")))
+                 for doc_id, job in docs.items()}
+        lengths = {doc_id: sum(counts.values()) for doc_id, counts in terms.items()}
+        n_docs, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM skill_docs").fetchone()
+        avg_length = (total + sum(lengths.values())) / (n_docs + len(docs)) or 1
+
+        self.conn.executemany("INSERT INTO skill_docs (id, slot, length) VALUES (?, ?, ?)",
+                              [(doc_id, slots[doc_id], lengths[doc_id]) for doc_id in docs])
+        self.conn.executemany("INSERT INTO skill_postings (skill, slot) VALUES (?, ?)",
+                              [(skill, slots[doc_id]) for doc_id, names in skills.items() for skill in names])
+        self.conn.executemany(
+            "INSERT INTO term_postings (term, slot, weight) VALUES (?, ?, ?)",
+            [(term, slots[doc_id],
+              tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / avg_length)))
+             for doc_id, counts in terms.items() for term, tf in counts.items()],
+        )
+        df = Counter(term for counts in terms.values() for term in counts)
+        self.conn.executemany("INSERT INTO term_df (term, df) VALUES (?, ?) "
+                              "ON CONFLICT (term) DO UPDATE SET df = df + excluded.df", df.items())
+        for doc_id in docs:
+            for skill in skills[doc_id]:
+                self._postings.pop(("skill", skill), None)
+            for term in terms[doc_id]:
+                self._postings.pop(("term", term), None)
+
+    def remove_many(self, ids):
+        slots = [(row[0],) for row in self._in_chunks("SELECT slot FROM skill_docs WHERE id IN ({ids})", ids)]
+        if not slots:
+            return
+        df = Counter()
+        for (slot,) in slots:
+            df.update(row[0] for row in self.conn.execute("SELECT term FROM term_postings WHERE slot = ?", (slot,)))
+        self.conn.executemany("UPDATE term_df SET df = df - ? WHERE term = ?", [(n, term) for term, n in df.items()])
+        self.conn.execute("DELETE FROM term_df WHERE df <= 0")
+        for table in ("skill_postings", "term_postings", "skill_docs"):
+            self.conn.executemany(f"DELETE FROM {table} WHERE slot = ?", slots)
+        self._postings.clear()
+
+    def skills_of(self, ids):
+        """{doc_id: set of skills} for the given ids"""
+        skills = defaultdict(set)
+        rows = self._in_chunks("SELECT d.id, p.skill FROM skill_docs d JOIN skill_postings p ON p.slot = d.slot "
+                               "WHERE d.id IN ({ids})", ids)
+        for doc_id, skill in rows:
+            skills[doc_id].add(skill)
+        return skills
+
+    def _postings_of(self, kind, key):
+        """(slots, weights) arrays of one skill or term, slots ascending"""
+        import numpy as np
+
+        if (kind, key) not in self._postings:
+            if kind == "skill":
+                rows = self.conn.execute("SELECT slot, 1.0 FROM skill_postings WHERE skill = ?", (key,)).fetchall()
+            else:
+                rows = self.conn.execute("SELECT slot, weight FROM term_postings WHERE term = ?", (key,)).fetchall()
+            self._postings[(kind, key)] = (np.array([row[0] for row in rows], dtype=np.int64),
+                                           np.array([row[1] for row in rows], dtype=np.float64))
+        return self._postings[(kind, key)]
+
+    def shortlist(self, skills, query_text="", size=200):
+        """Up to size (doc_id, matched_skills) pairs, best skill overlap plus BM25 first"""
+        import numpy as np
+
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            # Another connection committed changes to the postings
+            self._postings.clear()
+            self._data_version = version
+        n_docs = len(self)
+        if not n_docs:
+            return []
+        skills = sorted({normalize_skill(s) for s in skills})
+        # Skills double as query terms so a skill named only in a description still counts
+        terms = sorted(set(tokenize(query_text)) | {t for s in skills for t in tokenize(s)})
+        df = dict(self._in_chunks("SELECT term, df FROM term_df WHERE term IN ({ids})", terms))
+        usable = sorted((n, term) for term, n in df.items() if n <= BM25_MAX_DF_RATIO * n_docs)
+
+        skill_postings = [self._postings_of("skill", skill) for skill in skills]
+        slots = [postings for postings, _ in skill_postings]
+        weights = [SKILL_WEIGHT * w for _, w in skill_postings]
+        for n, term in usable[:BM25_MAX_QUERY_TERMS]:
+            postings, w = self._postings_of("term", term)
+            slots.append(postings)
+            weights.append(math.log(1 + (n_docs - n + 0.5) / (n + 0.5)) * w)
+        if not sum(len(postings) for postings in slots):
+            return []
+        scores = np.bincount(np.concatenate(slots), weights=np.concatenate(weights))
+        top = np.flatnonzero(scores)
+        if len(top) > size:
+            top = top[np.argpartition(-scores[top], size - 1)[:size]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        ids = dict(self._in_chunks("SELECT slot, id FROM skill_docs WHERE slot IN ({ids})", top.tolist()))
+        matched = [set() for _ in top]
+        for skill, (postings, _) in zip(skills, skill_postings):
+            positions = np.searchsorted(postings, top).clip(max=max(len(postings) - 1, 0))
+            for i in np.flatnonzero(postings[positions] == top) if len(postings) else ():
+                matched[i].add(skill)
+        return [(ids[slot], found) for slot, found in zip(top.tolist(), matched) if slot in ids]
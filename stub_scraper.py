@@ -0,0 +1,50 @@
+"""Offline stand-in for scrape_jobs.JobScraper (JOB_SCRAPER=stub).
+
+Returns deterministic synthetic postings instead of driving Chrome, so the
+API and dashboard can be load-tested without hitting LinkedIn or Naukri. The
+same search always returns the same jobs, which lets a replay LLM file be
+prepared for them ahead of time.
+
+STUB_SCRAPER_JOBS_PER_PAGE  postings per board per page
+STUB_SCRAPER_PAGE_MS        simulated time to load one results page
+"""
+import hashlib
+import os
+import time
+
+STUB_SCRAPER_JOBS_PER_PAGE = int(os.getenv("STUB_SCRAPER_JOBS_PER_PAGE", "10"))
+STUB_SCRAPER_PAGE_MS = float(os.getenv("STUB_SCRAPER_PAGE_MS", "200"))
+
+
+class StubJobScraper:
+    def __init__(self, headless=True):
+        self.headless = headless
+
+    def scrape_all_jobs(self, job_title, location="", max_pages=3, detailed=True):
+        """DataFrame shaped like JobScraper.scrape_all_jobs output"""
+        import pandas as pd
+
+        from job_corpus import synthetic_jobs
+
+        # Both boards, one page at a time
+        time.sleep(2 * max_pages * STUB_SCRAPER_PAGE_MS / 1000)
+        search = f"{job_title.strip().lower()}|{location.strip().lower()}"
+        seed = int(hashlib.sha1(search.encode('utf-8')).hexdigest()[:8], 16)
+        jobs = synthetic_jobs(2 * max_pages * STUB_SCRAPER_JOBS_PER_PAGE, seed=seed)
+        for i, job in enumerate(jobs):
+            job['job_link'] = f"https://jobs.example/{seed}/{i}"
+            if location.strip():
+                job['location'] = location.strip()
+            if not detailed:
+                job['description'] = ''
+        df = pd.DataFrame(jobs)
+        return df.sort_values(['source', 'title']).reset_index(drop=True)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
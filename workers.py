@@ -0,0 +1,191 @@
+"""Bounded background job pool shared by every session of the server process.
+
+Long work (scraping, LLM enrichment, embedding) runs here instead of in the
+Streamlit script thread. Callers get a job id back, keep it in session
+state and poll get_job() for progress and the result.
+
+WORKER_THREADS   jobs that run at once
+MAX_QUEUED_JOBS  queued plus running jobs before submit() refuses
+MAX_BROWSERS     Chrome instances open at once across all jobs
+BROWSER_IDLE_SECONDS  how long a finished job's browser is kept open for the next one
+MAX_MODEL_JOBS   jobs using the LLM/embedding stage at once
+"""
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import contextlib
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", "4"))
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", "20"))
+MAX_BROWSERS = int(os.getenv("MAX_BROWSERS", "2"))
+BROWSER_IDLE_SECONDS = float(os.getenv("BROWSER_IDLE_SECONDS", "300"))
+MAX_MODEL_JOBS = int(os.getenv("MAX_MODEL_JOBS", "2"))
+# Finished jobs are forgotten after this long
+JOB_RETENTION_SECONDS = 3600
+
+model_slots = threading.BoundedSemaphore(MAX_MODEL_JOBS)
+
+
+class BrowserPool:
+    """At most max_browsers scrapers open at once, reused across jobs so a search does not start Chrome.
+
+    Scrapers idle for longer than idle_seconds are closed; so is a scraper whose job raised.
+    """
+
+    def __init__(self, max_browsers=MAX_BROWSERS, idle_seconds=BROWSER_IDLE_SECONDS):
+        self.max_browsers = max_browsers
+        self.idle_seconds = idle_seconds
+        self._slots = threading.BoundedSemaphore(max_browsers)
+        self._idle = []  # (key, scraper, released_at), oldest first
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self, key):
+        """(idle scraper for key or None, idle scrapers to close so that a new one fits)"""
+        cutoff = time.time() - self.idle_seconds
+        with self._lock:
+            to_close = [scraper for _, scraper, released_at in self._idle if released_at < cutoff]
+            self._idle = [entry for entry in self._idle if entry[2] >= cutoff]
+            scraper = None
+            for i, entry in enumerate(self._idle):
+                if entry[0] == key:
+                    scraper = self._idle.pop(i)[1]
+                    break
+            else:
+                # A browser of another kind may be idle in the slot this job needs
+                while self._idle and self._busy + len(self._idle) >= self.max_browsers:
+                    to_close.append(self._idle.pop(0)[1])
+            self._busy += 1
+            return scraper, to_close
+
+    @staticmethod
+    def _close(scraper):
+        try:
+            scraper.close()
+        except Exception as e:
+            logger.warning(f"Could not close a pooled browser: {e}")
+
+    @contextlib.contextmanager
+    def scraper(self, create, key=None, on_create=None):
+        """Borrow an idle scraper made for key, or one from create() (calling on_create first)"""
+        with self._slots:
+            scraper, to_close = self._checkout(key)
+            for old in to_close:
+                self._close(old)
+            reusable = False
+            try:
+                if scraper is None:
+                    if on_create is not None:
+                        on_create()
+                    scraper = create()
+                yield scraper
+                reusable = True
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    if reusable:
+                        self._idle.append((key, scraper, time.time()))
+                if scraper is not None and not reusable:
+                    self._close(scraper)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, scraper, _ in idle:
+            self._close(scraper)
+
+
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close_all)
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class Job:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = "queued"
+        self.progress = 0
+        self.message = "Waiting for a free worker..."
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def update(self, progress, message):
+        """Called from the job function to report progress (0-100)"""
+        self.progress = progress
+        self.message = message
+
+
+class WorkerPool:
+    def __init__(self, max_workers=WORKER_THREADS, max_queued=MAX_QUEUED_JOBS):
+        self.max_queued = max_queued
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = "running"
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            logger.exception(f"Background job {job.name} ({job.id}) failed")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def submit(self, fn, *args, name=None, **kwargs):
+        """Queue fn(job, *args, **kwargs) and return the job id; raises QueueFull when saturated"""
+        with self._lock:
+            self._forget_old()
+            active = sum(1 for job in self.jobs.values() if not job.done)
+            if active >= self.max_queued:
+                raise QueueFull(f"{active} jobs are already queued or running")
+            job = Job(name or fn.__name__)
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return {status: sum(1 for job in jobs if job.status == status)
+                for status in ("queued", "running", "done", "failed")}
+
+    def _forget_old(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self.jobs.values() if j.done and j.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool()
+        return _pool